@@ -0,0 +1,50 @@
+"""Compare building keyboards per update with the prebuilt registry.
+
+Usage:
+    python benchmarks/keyboard_cache.py [calls]
+
+For every static keyboard reports time and memory allocated per call when
+the markup is built and validated on each update (what handlers did
+before) and when the shared frozen instance is taken from the registry.
+A reminder dialog sends the cancel keyboard at each of its steps.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bot.utils.keyboards import STATIC_KEYBOARDS, get_keyboard  # noqa: E402
+
+LANGUAGES = ["en", "ru", "ua"]
+
+
+def per_call(func, calls: int):
+    """(microseconds, bytes allocated) per call"""
+    start = time.perf_counter()
+    for i in range(calls):
+        func(LANGUAGES[i % len(LANGUAGES)])
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    results = [func(LANGUAGES[i % len(LANGUAGES)]) for i in range(1000)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return elapsed / calls * 1e6, allocated / 1000
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{calls} calls per keyboard")
+    print(f"{'keyboard':<12}{'build us':>10}{'build B':>10}{'cached us':>11}{'cached B':>10}")
+
+    for name, build in STATIC_KEYBOARDS.items():
+        build_us, build_bytes = per_call(build, calls)
+        cached_us, cached_bytes = per_call(lambda lang: get_keyboard(name, lang), calls)
+        print(f"{name:<12}{build_us:>10.1f}{build_bytes:>10.0f}{cached_us:>11.2f}{cached_bytes:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
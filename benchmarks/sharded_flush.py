@@ -0,0 +1,74 @@
+"""Compare single data file and sharded storage: cost of one user action.
+
+Usage:
+    python benchmarks/sharded_flush.py [users] [reminders_per_user] [shards]
+
+For each store the same data set is written once, then one reminder is
+added for a single user and flushed. Reports startup (open + first user
+access), flush time and bytes written by that flush.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bot.utils.sharded_store import ShardedStore  # noqa: E402
+from bot.utils.store import MemoryStore, write_json_file  # noqa: E402
+from bot.utils.models import encode_data  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from snapshot_codec import make_state  # noqa: E402
+
+
+def written_bytes(directory: str, since: float) -> int:
+    """Size of files under ``directory`` modified after ``since``"""
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.getmtime(path) >= since and not name.endswith((".bak", ".lock")):
+                total += os.path.getsize(path)
+    return total
+
+
+def measure(name: str, open_store, directory: str, user_id: int) -> None:
+    start = time.perf_counter()
+    store = open_store()
+    store.get_reminders(user_id)
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    store.add_reminder(user_id, "One more", 1900000000)
+    since = time.time()
+    start = time.perf_counter()
+    store.flush()
+    flush_ms = (time.perf_counter() - start) * 1000
+    size = written_bytes(directory, since) / 1024
+    store.close()
+    print(f"{name:<10}{startup_ms:>12.1f}{flush_ms:>10.1f}{size:>14.1f}")
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    shards = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+    state = make_state(users, per_user)
+    user_id = next(iter(state[0]))
+    print(f"{users} users x {per_user} reminders, {shards} shards")
+    print(f"{'store':<10}{'startup ms':>12}{'flush ms':>10}{'written KiB':>14}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "reminders.json")
+        shard_dir = os.path.join(directory, "shards")
+        write_json_file(data_file, encode_data(*state))
+
+        seeded = ShardedStore(shard_dir, shard_count=shards, seed_path=data_file)
+        seeded.close()
+
+        measure("single", lambda: MemoryStore(data_file), directory, user_id)
+        measure("sharded", lambda: ShardedStore(shard_dir), shard_dir, user_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare data file formats: startup load and flush cost.
+
+Usage:
+    python benchmarks/snapshot_codec.py [users] [reminders_per_user]
+
+Measures the legacy version 1 JSON file (indent=2, dict per reminder), the
+current compact JSON layout and the binary snapshot, each written to and
+read back from a temporary directory.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bot.utils.binary_codec import read_binary_file, write_binary_file  # noqa: E402
+from bot.utils.models import Reminder, UserProfile, decode_data, encode_data, export_data  # noqa: E402
+from bot.utils.store import read_json_file, write_json_file  # noqa: E402
+
+TEXTS = ["Позвонить врачу", "Купити хліб і молоко", "Call the doctor", "Оплатить интернет до пятницы"]
+TIMEZONES = ["Europe/Kyiv", "Europe/Moscow", "Europe/London", "America/New_York"]
+
+
+def make_state(users: int, per_user: int):
+    rng = random.Random(42)
+    profiles, reminders, next_ids = {}, {}, {}
+    for user_id in range(100000, 100000 + users):
+        profiles[user_id] = UserProfile(rng.choice(["en", "ru", "ua"]), rng.choice(TIMEZONES))
+        user_reminders = reminders[user_id] = {}
+        for reminder_id in range(1, per_user + 1):
+            repeat = "0 9 * * 1-5" if rng.random() < 0.2 else None
+            user_reminders[reminder_id] = Reminder(
+                reminder_id,
+                f"{rng.choice(TEXTS)} #{reminder_id}",
+                1761800040 + 60 * rng.randint(0, 60 * 24 * 60),
+                1761500000,
+                rng.random() < 0.5,
+                repeat,
+                profiles[user_id].timezone if repeat else None
+            )
+        next_ids[user_id] = per_user + 1
+    return profiles, reminders, next_ids
+
+
+def timed(func, repeat: int = 3) -> float:
+    """Best of ``repeat`` runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def write_legacy(path, state):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(export_data(state[0], state[1]), f, indent=2, ensure_ascii=False)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    state = make_state(users, per_user)
+    print(f"{users} users x {per_user} reminders")
+    print(f"{'format':<14}{'size KiB':>10}{'flush ms':>10}{'load ms':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        formats = [
+            ("json v1", "v1.json",
+             lambda p: write_legacy(p, state),
+             lambda p: decode_data(read_json_file(p))),
+            ("json v2", "v2.json",
+             lambda p: write_json_file(p, encode_data(*state)),
+             lambda p: decode_data(read_json_file(p))),
+            ("binary", "data.bin",
+             lambda p: write_binary_file(p, state),
+             lambda p: read_binary_file(p)[0]),
+        ]
+        for name, filename, write, load in formats:
+            path = os.path.join(directory, filename)
+            flush_ms = timed(lambda: write(path))
+            load_ms = timed(lambda: load(path))
+            size = os.path.getsize(path) / 1024
+            assert load(path)[1] == state[1], f"{name} does not round-trip"
+            print(f"{name:<14}{size:>10.0f}{flush_ms:>10.1f}{load_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,4 +7,51 @@ load_dotenv()
 TOKEN = os.getenv("BOT_TOKEN")
 
 if not TOKEN:
-    raise ValueError("BOT_TOKEN not found in environment variables!")
\ No newline at end of file
+    raise ValueError("BOT_TOKEN not found in environment variables!")
+
+# Storage settings
+DATA_DIR = os.getenv("DATA_DIR", "data")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")  # "json", "sqlite", "journal" or "sharded"
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "json")  # data file/snapshot written as "json" or "binary"
+STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", "5"))  # seconds
+JOURNAL_COMPACT_BYTES = int(os.getenv("JOURNAL_COMPACT_BYTES", str(1024 * 1024)))
+STORAGE_SHARDS = int(os.getenv("STORAGE_SHARDS", "256"))  # user buckets of a new sharded store
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))  # cached user profiles
+REMINDER_LIST_CACHE_SIZE = int(os.getenv("REMINDER_LIST_CACHE_SIZE", "1000"))  # cached sorted reminder lists
+REMINDERS_PER_PAGE = int(os.getenv("REMINDERS_PER_PAGE", "10"))  # reminders on one page of /list_reminders
+
+# Unfinished reminder dialogs are dropped after this many idle seconds (0 = never)
+DIALOG_TTL_SECONDS = float(os.getenv("DIALOG_TTL_SECONDS", str(24 * 3600)))
+DIALOG_SWEEP_SECONDS = float(os.getenv("DIALOG_SWEEP_SECONDS", "600"))  # how often expired dialogs are dropped
+
+# Sent reminders older than this move to compressed archive (0 = keep in live store)
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", "7"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))  # how often to check
+
+# Scheduler settings
+SCHEDULER_GRACE_SECONDS = int(os.getenv("SCHEDULER_GRACE_SECONDS", "60"))  # later deliveries count as late
+SCHEDULER_CATCHUP_SECONDS = int(os.getenv("SCHEDULER_CATCHUP_SECONDS", "0"))  # max age sent after restart, 0 = all
+SCHEDULER_WINDOW_SECONDS = int(os.getenv("SCHEDULER_WINDOW_SECONDS", "600"))  # reminders due this soon are kept in memory
+
+# Notification dispatch (Telegram allows ~30 msg/s per bot, ~1 msg/s per chat)
+DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", "16"))
+DISPATCH_GLOBAL_RATE = float(os.getenv("DISPATCH_GLOBAL_RATE", "30"))  # messages per second
+DISPATCH_CHAT_RATE = float(os.getenv("DISPATCH_CHAT_RATE", "1"))  # messages per second per chat
+
+# Outbox retries for failed notifications
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))  # then moved to dead letters
+OUTBOX_BASE_DELAY = float(os.getenv("OUTBOX_BASE_DELAY", "30"))  # seconds, doubled per attempt
+OUTBOX_MAX_DELAY = float(os.getenv("OUTBOX_MAX_DELAY", "3600"))  # seconds
+
+# Multi-process scheduling: users are split into partitions leased by
+# scheduler workers through a shared SQLite file (0 = single process)
+SCHEDULER_PARTITIONS = int(os.getenv("SCHEDULER_PARTITIONS", "0"))
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", "30"))  # lease lifetime, well above 1s ack commits
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "1") == "1"  # run scheduler in the polling process
+
+# Profiles changed by another process are picked up after this many seconds
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "60" if SCHEDULER_PARTITIONS else "0"))
+
+if SCHEDULER_PARTITIONS and STORAGE_BACKEND != "sqlite":
+    raise ValueError("SCHEDULER_PARTITIONS requires STORAGE_BACKEND=sqlite (shared between processes)")
\ No newline at end of file
@@ -0,0 +1,42 @@
+from typing import Any, Awaitable, Callable, Dict, Union
+from aiogram import Router
+from aiogram.filters import BaseFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message
+from bot.handlers import reminders, start
+from bot.utils.localization import find_button
+
+router = Router()
+
+ButtonHandler = Callable[[Message, FSMContext, str, str], Awaitable[Any]]
+
+# Reply keyboard button action (localization.REPLY_BUTTON_ACTIONS) -> handler
+BUTTON_HANDLERS: Dict[str, ButtonHandler] = {
+    "create_reminder": reminders.button_create_reminder,
+    "my_reminders": reminders.button_list_reminders,
+    "change_language": start.button_change_language,
+    "help": start.button_help,
+    "cancel": reminders.cancel_reminder,
+}
+
+
+class ReplyButton(BaseFilter):
+    """Match any reply keyboard button with one dict lookup.
+
+    Passes ``button`` (action) to the handler and replaces ``lang`` with
+    the language of the pressed button, so the answer matches the keyboard
+    the user sees.
+    """
+
+    async def __call__(self, message: Message) -> Union[bool, Dict[str, str]]:
+        found = find_button(message.text)
+        if found is None:
+            return False
+        action, lang = found
+        return {"button": action, "lang": lang}
+
+
+@router.message(ReplyButton())
+async def process_reply_button(message: Message, state: FSMContext, button: str, lang: str, tz: str):
+    """Run handler of pressed reply keyboard button (in any dialog state)"""
+    await BUTTON_HANDLERS[button](message, state, lang, tz)
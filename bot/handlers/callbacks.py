@@ -0,0 +1,37 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+from bot.handlers import reminders, start
+from bot.utils.callback_data import decode_callback
+from bot.utils.localization import get_text
+
+router = Router()
+
+
+async def process_noop(callback: CallbackQuery, state: FSMContext, lang: str, tz: str):
+    """Button that only shows information (current list page)"""
+    await callback.answer()
+
+
+# Callback action (callback_data.OPCODES) -> handler, called with decoded arguments
+CALLBACK_HANDLERS: Dict[str, Callable[..., Awaitable[Any]]] = {
+    "lang": start.process_language_selection,
+    "tz": start.process_timezone_selection,
+    "repeat": reminders.process_repeat_choice,
+    "list": reminders.process_list_page,
+    "noop": process_noop,
+    "delete": reminders.process_delete_request,
+    "confirm_delete": reminders.process_confirm_delete,
+    "cancel_delete": reminders.process_cancel_delete,
+}
+
+
+@router.callback_query()
+async def process_callback(callback: CallbackQuery, state: FSMContext, lang: str, tz: str):
+    """Route inline button press by its opcode"""
+    decoded = decode_callback(callback.data)
+    if decoded is None:
+        await callback.answer(get_text(lang, "button_outdated"), show_alert=True)
+        return
+    await CALLBACK_HANDLERS[decoded.action](callback, state, lang, tz, *decoded.args)
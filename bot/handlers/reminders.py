@@ -1,23 +1,40 @@
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
+import html
+import time
 from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from bot.config import REMINDERS_PER_PAGE
 from bot.states.reminder import ReminderStates
-from bot.utils.localization import get_text, get_user_lang
-from bot.utils.keyboards import get_cancel_keyboard, get_main_menu_keyboard
-from bot.utils.storage import add_reminder, get_user_reminders, delete_reminder, get_user_timezone  # Add new imports
-from bot.utils.timezones import convert_to_utc
+from bot.utils.localization import get_text
+from bot.utils.keyboards import (
+    get_cancel_keyboard, get_main_menu_keyboard, get_reminder_list_keyboard, get_repeat_keyboard
+)
+from bot.utils import async_storage as storage
+from bot.utils.callback_data import encode_callback
+from bot.utils.recurrence import describe_rule, next_occurrence, parse_rule_text, preset_rule
+from bot.utils.models import Reminder
+from bot.utils.timezones import local_date_time, local_now, local_to_timestamp
 
 router = Router()
 
+# Longest reminder text shown on a list page (a page must fit in one message)
+LIST_TEXT_LIMIT = 200
+
+
+def format_repeat(lang: str, reminder: Reminder) -> str:
+    """Repeat line for recurring reminder, empty for one-shot"""
+    if not reminder.repeat:
+        return ""
+    kind, args = describe_rule(reminder.repeat)
+    return "\n" + get_text(lang, f"repeat_{kind}").format(**args)
+
 
 @router.message(Command("set_reminder"))
-async def cmd_set_reminder(message: Message, state: FSMContext):
+async def cmd_set_reminder(message: Message, state: FSMContext, lang: str):
     """Start reminder creation process"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
     await state.set_state(ReminderStates.waiting_for_text)
     await message.answer(
         get_text(lang, "reminder_text_prompt"),
@@ -25,12 +42,8 @@ async def cmd_set_reminder(message: Message, state: FSMContext):
     )
 
 
-@router.message(F.text.in_(["🚫 Cancel", "🚫 Отменить", "🚫 Скасувати"]))
-async def cancel_reminder(message: Message, state: FSMContext):
-    """Cancel reminder creation"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
+async def cancel_reminder(message: Message, state: FSMContext, lang: str, tz: str):
+    """Cancel reminder creation ('Cancel' button, dispatched by handlers.buttons)"""
     await state.clear()
     await message.answer(
         get_text(lang, "reminder_cancelled"),
@@ -39,11 +52,8 @@ async def cancel_reminder(message: Message, state: FSMContext):
 
 
 @router.message(ReminderStates.waiting_for_text)
-async def process_reminder_text(message: Message, state: FSMContext):
+async def process_reminder_text(message: Message, state: FSMContext, lang: str):
     """Process reminder text input"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
     # Save reminder text to FSM storage
     await state.update_data(text=message.text)
     
@@ -56,17 +66,14 @@ async def process_reminder_text(message: Message, state: FSMContext):
 
 
 @router.message(ReminderStates.waiting_for_date)
-async def process_reminder_date(message: Message, state: FSMContext):
+async def process_reminder_date(message: Message, state: FSMContext, lang: str, tz: str):
     """Process reminder date input"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
     # Validate date format
     try:
         date_obj = datetime.strptime(message.text, "%Y-%m-%d")
         
-        # Check if date is not in the past
-        if date_obj.date() < datetime.now().date():
+        # Check if date is not in the past (in user's timezone)
+        if date_obj.date() < local_now(tz).date():
             await message.answer(
                 get_text(lang, "date_in_past"),
                 reply_markup=get_cancel_keyboard(lang)
@@ -91,56 +98,36 @@ async def process_reminder_date(message: Message, state: FSMContext):
 
 
 @router.message(ReminderStates.waiting_for_time)
-async def process_reminder_time(message: Message, state: FSMContext):
-    """Process reminder time input and create reminder"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
+async def process_reminder_time(message: Message, state: FSMContext, lang: str, tz: str):
+    """Process reminder time input and ask for repeat rule"""
     # Validate time format
     try:
         time_obj = datetime.strptime(message.text, "%H:%M")
         
         # Get all data from FSM storage
         data = await state.get_data()
-        reminder_text = data.get("text")
         reminder_date = data.get("date")
         reminder_time = message.text
         
-        # Get user's timezone
-        user_tz = get_user_timezone(user_id)
-        
-        # Convert to UTC for storage
-        utc_datetime = convert_to_utc(reminder_date, reminder_time, user_tz)
+        # Convert to UTC epoch seconds for comparison
+        due = local_to_timestamp(reminder_date, reminder_time, tz)
         
         # Check if datetime is not in the past
-        if utc_datetime < datetime.now(pytz.UTC):
+        if due < time.time():
             await message.answer(
                 get_text(lang, "date_in_past"),
                 reply_markup=get_cancel_keyboard(lang)
             )
             return
         
-        # Save reminder to JSON (store UTC time)
-        reminder = add_reminder(
-            user_id, 
-            reminder_text, 
-            utc_datetime.strftime("%Y-%m-%d"),
-            utc_datetime.strftime("%H:%M")
-        )
-        
-        # Clear FSM state
-        await state.clear()
-        
-        # Show confirmation with user's local time
-        confirmation = get_text(lang, "reminder_created").format(
-            text=reminder_text,
-            date=reminder_date,
-            time=reminder_time
-        )
+        # Save time to FSM storage
+        await state.update_data(time=reminder_time)
         
+        # Move to next state
+        await state.set_state(ReminderStates.waiting_for_repeat)
         await message.answer(
-            confirmation,
-            reply_markup=get_main_menu_keyboard(lang)
+            get_text(lang, "reminder_repeat_prompt"),
+            reply_markup=get_repeat_keyboard(lang)
         )
         
     except ValueError:
@@ -150,80 +137,180 @@ async def process_reminder_time(message: Message, state: FSMContext):
         )
 
 
-# Handler for button press (from main menu)
-@router.message(F.text.in_([
-    "➕ Create Reminder", "➕ Создать напоминание", "➕ Створити нагадування"
-]))
-async def button_create_reminder(message: Message, state: FSMContext):
+async def process_repeat_choice(callback: CallbackQuery, state: FSMContext, lang: str, tz: str, kind: str):
+    """Process repeat option chosen with inline button"""
+    if await state.get_state() != ReminderStates.waiting_for_repeat.state:
+        # Button of a finished or cancelled dialog
+        await callback.answer()
+        return
+    
+    data = await state.get_data()
+    local_dt = datetime.strptime(f"{data['date']} {data['time']}", "%Y-%m-%d %H:%M")
+    
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await create_reminder(
+        callback.message, state, lang, tz, callback.from_user.id, preset_rule(kind, local_dt)
+    )
+    await callback.answer()
+
+
+@router.message(ReminderStates.waiting_for_repeat)
+async def process_repeat_text(message: Message, state: FSMContext, lang: str, tz: str):
+    """Process repeat rule typed by user"""
+    data = await state.get_data()
+    local_dt = datetime.strptime(f"{data['date']} {data['time']}", "%Y-%m-%d %H:%M")
+    
+    try:
+        repeat = parse_rule_text(message.text or "", local_dt)
+    except ValueError:
+        await message.answer(
+            get_text(lang, "invalid_repeat"),
+            reply_markup=get_repeat_keyboard(lang)
+        )
+        return
+    
+    await create_reminder(message, state, lang, tz, message.from_user.id, repeat)
+
+
+async def create_reminder(
+    message: Message,
+    state: FSMContext,
+    lang: str,
+    tz: str,
+    user_id: int,
+    repeat: Optional[str] = None
+):
+    """Save reminder collected by the dialog and confirm it"""
+    data = await state.get_data()
+    reminder_text = data.get("text")
+    reminder_date = data.get("date")
+    reminder_time = data.get("time")
+    
+    # Convert to UTC for storage
+    due = local_to_timestamp(reminder_date, reminder_time, tz)
+    
+    if repeat:
+        # First occurrence at or after the chosen moment
+        due = next_occurrence(repeat, tz, due - 60)
+        if due is None:
+            await message.answer(
+                get_text(lang, "invalid_repeat"),
+                reply_markup=get_repeat_keyboard(lang)
+            )
+            return
+    
+    # Save reminder (store UTC epoch seconds, rule in user's timezone)
+    reminder = await storage.add_reminder(user_id, reminder_text, due, repeat, tz)
+    
+    # Clear FSM state
+    await state.clear()
+    
+    # Show confirmation with user's local time of the first occurrence
+    # (a repeat rule may move it away from the date and time entered)
+    first_date, first_time = local_date_time(reminder.due, tz)
+    confirmation = get_text(lang, "reminder_created").format(
+        text=reminder_text,
+        date=first_date,
+        time=first_time
+    ) + format_repeat(lang, reminder)
+    
+    await message.answer(
+        confirmation,
+        reply_markup=get_main_menu_keyboard(lang)
+    )
+
+
+# Main menu buttons, dispatched by handlers.buttons
+async def button_create_reminder(message: Message, state: FSMContext, lang: str, tz: str):
     """Handle 'Create Reminder' button press"""
-    await cmd_set_reminder(message, state)
+    await cmd_set_reminder(message, state, lang)
 
 
 @router.message(Command("list_reminders"))
-async def cmd_list_reminders(message: Message):
-    """Show all active reminders for user"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
-    # Get active reminders
-    reminders = get_user_reminders(user_id, active_only=True)
+async def cmd_list_reminders(message: Message, lang: str, tz: str):
+    """Show active reminders as one paginated message"""
+    reminders = await storage.get_sorted_reminders(message.from_user.id)
     
     if not reminders:
         await message.answer(get_text(lang, "no_reminders"))
         return
     
-    # Sort reminders by datetime
-    reminders.sort(key=lambda r: r["datetime"])
+    text, keyboard = render_reminder_page(lang, tz, reminders, 0)
+    await message.answer(
+        text,
+        reply_markup=keyboard,
+        parse_mode="HTML"
+    )
+
+
+def render_reminder_page(
+    lang: str,
+    tz: str,
+    reminders: Sequence[Reminder],
+    page: int
+) -> Tuple[str, InlineKeyboardMarkup]:
+    """Text and keyboard of one list page (page number is clamped)"""
+    pages = max((len(reminders) + REMINDERS_PER_PAGE - 1) // REMINDERS_PER_PAGE, 1)
+    page = min(max(page, 0), pages - 1)
+    chunk = reminders[page * REMINDERS_PER_PAGE:(page + 1) * REMINDERS_PER_PAGE]
     
-    # Send header
-    await message.answer(get_text(lang, "your_reminders"))
+    items = []
+    for reminder in chunk:
+        local_date, local_time = local_date_time(reminder.due, tz)
+        items.append(get_text(lang, "reminder_item").format(
+            id=reminder.id,
+            text=html.escape(shorten(reminder.text, LIST_TEXT_LIMIT)),
+            date=local_date,
+            time=local_time
+        ) + format_repeat(lang, reminder))
     
-    # Send each reminder with delete button
-    for reminder in reminders:
-        reminder_text = get_text(lang, "reminder_item").format(
-            id=reminder["id"],
-            text=reminder["text"],
-            date=reminder["date"],
-            time=reminder["time"]
-        )
-        
-        # Create inline keyboard with delete button
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(
-                text=get_text(lang, "btn_delete"),
-                callback_data=f"delete_{reminder['id']}"
-            )]
-        ])
-        
-        await message.answer(
-            reminder_text,
-            reply_markup=keyboard,
-            parse_mode="HTML"
-        )
+    text = get_text(lang, "your_reminders") + "\n\n" + "\n\n".join(items)
+    if pages > 1:
+        text += "\n\n" + get_text(lang, "list_page").format(page=page + 1, pages=pages)
+    return text, get_reminder_list_keyboard([r.id for r in chunk], page, pages)
+
+
+def shorten(text: str, limit: int) -> str:
+    """Cut long text to ``limit`` characters so a page fits in one message"""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
 
+async def show_reminder_page(callback: CallbackQuery, lang: str, tz: str, page: int):
+    """Replace list message with given page (or the empty-list text)"""
+    reminders = await storage.get_sorted_reminders(callback.from_user.id)
+    if not reminders:
+        await callback.message.edit_text(get_text(lang, "no_reminders"))
+        return
+    
+    text, keyboard = render_reminder_page(lang, tz, reminders, page)
+    await callback.message.edit_text(
+        text,
+        reply_markup=keyboard,
+        parse_mode="HTML"
+    )
 
-@router.message(F.text.in_([
-    "📋 My Reminders", "📋 Мои напоминания", "📋 Мої нагадування"
-]))
-async def button_list_reminders(message: Message):
+
+async def button_list_reminders(message: Message, state: FSMContext, lang: str, tz: str):
     """Handle 'My Reminders' button press"""
-    await cmd_list_reminders(message)
+    await cmd_list_reminders(message, lang, tz)
+
 
+async def process_list_page(callback: CallbackQuery, state: FSMContext, lang: str, tz: str, page: int):
+    """Navigate between list pages"""
+    await show_reminder_page(callback, lang, tz, page)
+    await callback.answer()
 
-@router.callback_query(F.data.startswith("delete_"))
-async def process_delete_request(callback: CallbackQuery):
-    """Show confirmation dialog for reminder deletion"""
+
+async def process_delete_request(
+    callback: CallbackQuery, state: FSMContext, lang: str, tz: str, reminder_id: int, page: int
+):
+    """Show confirmation dialog for reminder deletion (``page`` is the list page to return to)"""
     user_id = callback.from_user.id
-    lang = get_user_lang(user_id)
-    
-    # Extract reminder ID
-    reminder_id = int(callback.data.split("_")[1])
     
     # Get reminder details
-    reminders = get_user_reminders(user_id, active_only=True)
-    reminder = next((r for r in reminders if r["id"] == reminder_id), None)
+    reminder = await storage.get_reminder(user_id, reminder_id)
     
-    if not reminder:
+    if not reminder or reminder.sent:
         await callback.answer(
             get_text(lang, "reminder_not_found"),
             show_alert=True
@@ -235,20 +322,21 @@ async def process_delete_request(callback: CallbackQuery):
         [
             InlineKeyboardButton(
                 text=get_text(lang, "btn_confirm_delete"),
-                callback_data=f"confirm_delete_{reminder_id}"
+                callback_data=encode_callback("confirm_delete", reminder_id, page)
             ),
             InlineKeyboardButton(
                 text=get_text(lang, "btn_cancel_delete"),
-                callback_data=f"cancel_delete_{reminder_id}"
+                callback_data=encode_callback("cancel_delete", reminder_id, page)
             )
         ]
     ])
     
     # Show confirmation message
+    local_date, local_time = local_date_time(reminder.due, tz)
     confirm_text = get_text(lang, "confirm_delete").format(
-        text=reminder["text"],
-        date=reminder["date"],
-        time=reminder["time"]
+        text=reminder.text,
+        date=local_date,
+        time=local_time
     )
     
     await callback.message.edit_text(
@@ -258,63 +346,24 @@ async def process_delete_request(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("confirm_delete_"))
-async def process_confirm_delete(callback: CallbackQuery):
-    """Delete reminder after confirmation"""
+async def process_confirm_delete(
+    callback: CallbackQuery, state: FSMContext, lang: str, tz: str, reminder_id: int, page: int
+):
+    """Delete reminder after confirmation and return to the list page"""
     user_id = callback.from_user.id
-    lang = get_user_lang(user_id)
-    
-    # Extract reminder ID
-    reminder_id = int(callback.data.split("_")[2])
     
     # Delete reminder
-    success = delete_reminder(user_id, reminder_id)
+    success = await storage.delete_reminder(user_id, reminder_id)
     
-    if success:
-        await callback.message.edit_text(
-            get_text(lang, "reminder_deleted")
-        )
-    else:
-        await callback.message.edit_text(
-            get_text(lang, "reminder_not_found")
-        )
-    
-    await callback.answer()
+    await show_reminder_page(callback, lang, tz, page)
+    await callback.answer(
+        get_text(lang, "reminder_deleted" if success else "reminder_not_found")
+    )
 
 
-@router.callback_query(F.data.startswith("cancel_delete_"))
-async def process_cancel_delete(callback: CallbackQuery):
-    """Cancel reminder deletion"""
-    user_id = callback.from_user.id
-    lang = get_user_lang(user_id)
-    
-    # Extract reminder ID
-    reminder_id = int(callback.data.split("_")[2])
-    
-    # Get reminder details to restore original message
-    reminders = get_user_reminders(user_id, active_only=True)
-    reminder = next((r for r in reminders if r["id"] == reminder_id), None)
-    
-    if reminder:
-        reminder_text = get_text(lang, "reminder_item").format(
-            id=reminder["id"],
-            text=reminder["text"],
-            date=reminder["date"],
-            time=reminder["time"]
-        )
-        
-        # Restore delete button
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(
-                text=get_text(lang, "btn_delete"),
-                callback_data=f"delete_{reminder['id']}"
-            )]
-        ])
-        
-        await callback.message.edit_text(
-            reminder_text,
-            reply_markup=keyboard,
-            parse_mode="HTML"
-        )
-    
-    await callback.answer(get_text(lang, "deletion_cancelled"))
\ No newline at end of file
+async def process_cancel_delete(
+    callback: CallbackQuery, state: FSMContext, lang: str, tz: str, reminder_id: int, page: int
+):
+    """Cancel reminder deletion and return to the list page"""
+    await show_reminder_page(callback, lang, tz, page)
+    await callback.answer(get_text(lang, "deletion_cancelled"))
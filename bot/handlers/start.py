@@ -1,46 +1,14 @@
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.filters import Command
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from bot.utils.localization import get_text, get_user_lang
-from bot.utils.keyboards import get_main_menu_keyboard
-from bot.utils.storage import set_user_language, get_user_timezone, set_user_timezone
-from bot.utils.timezones import get_timezone_keyboard_data
+from aiogram.types import Message, CallbackQuery
+from aiogram.fsm.context import FSMContext
+from bot.utils.localization import get_text
+from bot.utils.keyboards import get_language_keyboard, get_main_menu_keyboard, get_timezone_keyboard
+from bot.utils import async_storage as storage
 
 router = Router()
 
 
-def get_language_keyboard() -> InlineKeyboardMarkup:
-    """Create inline keyboard for language selection"""
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="🇬🇧 English", callback_data="lang_en"),
-            InlineKeyboardButton(text="🇷🇺 Русский", callback_data="lang_ru"),
-            InlineKeyboardButton(text="🇺🇦 Українська", callback_data="lang_ua"),
-        ]
-    ])
-    return keyboard
-
-
-def get_timezone_keyboard() -> InlineKeyboardMarkup:
-    """Create inline keyboard for timezone selection"""
-    timezones = get_timezone_keyboard_data()
-    
-    # Create keyboard with 2 timezones per row
-    keyboard_buttons = []
-    for i in range(0, len(timezones), 2):
-        row = []
-        for j in range(2):
-            if i + j < len(timezones):
-                tz_id, tz_name = timezones[i + j]
-                row.append(InlineKeyboardButton(
-                    text=tz_name,
-                    callback_data=f"tz_{tz_id}"
-                ))
-        keyboard_buttons.append(row)
-    
-    return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-
-
 @router.message(Command("start"))
 async def cmd_start(message: Message):
     """Handle /start command - show language selection"""
@@ -51,14 +19,14 @@ async def cmd_start(message: Message):
     )
 
 
-@router.callback_query(F.data.startswith("lang_"))
-async def process_language_selection(callback: CallbackQuery):
+async def process_language_selection(
+    callback: CallbackQuery, state: FSMContext, lang: str, tz: str, lang_code: str
+):
     """Handle language selection from inline buttons"""
-    lang_code = callback.data.split("_")[1]
     user_id = callback.from_user.id
     
     # Store user language in JSON
-    set_user_language(user_id, lang_code)
+    await storage.set_user_language(user_id, lang_code)
     
     # Show timezone selection
     await callback.message.edit_text(
@@ -69,17 +37,14 @@ async def process_language_selection(callback: CallbackQuery):
     await callback.answer(get_text(lang_code, "language_changed"))
 
 
-@router.callback_query(F.data.startswith("tz_"))
-async def process_timezone_selection(callback: CallbackQuery):
+async def process_timezone_selection(
+    callback: CallbackQuery, state: FSMContext, lang: str, tz: str, timezone: str
+):
     """Handle timezone selection"""
-    timezone = callback.data[3:]  # Remove "tz_" prefix
     user_id = callback.from_user.id
     
     # Store timezone
-    set_user_timezone(user_id, timezone)
-    
-    # Get user language
-    lang = get_user_lang(user_id)
+    await storage.set_user_timezone(user_id, timezone)
     
     # Get localized texts
     title = get_text(lang, "start_title")
@@ -105,23 +70,16 @@ async def process_timezone_selection(callback: CallbackQuery):
 
 
 @router.message(Command("language"))
-async def cmd_language(message: Message):
+async def cmd_language(message: Message, lang: str):
     """Handle /language command - allow user to change language"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
     text = get_text(lang, "select_language")
     await message.answer(text, reply_markup=get_language_keyboard())
 
 
 @router.message(Command("timezone"))
-async def cmd_timezone(message: Message):
+async def cmd_timezone(message: Message, lang: str, tz: str):
     """Handle /timezone command - allow user to change timezone"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    current_tz = get_user_timezone(user_id)
-    
-    text = get_text(lang, "current_timezone").format(timezone=current_tz)
+    text = get_text(lang, "current_timezone").format(timezone=tz)
     text += "\n\n" + get_text(lang, "select_timezone")
     
     await message.answer(
@@ -132,11 +90,8 @@ async def cmd_timezone(message: Message):
 
 
 @router.message(Command("help"))
-async def cmd_help(message: Message):
+async def cmd_help(message: Message, lang: str):
     """Handle /help command - show available commands"""
-    user_id = message.from_user.id
-    lang = get_user_lang(user_id)
-    
     title = get_text(lang, "help_title")
     help_text = get_text(lang, "help_text")
     
@@ -146,18 +101,12 @@ async def cmd_help(message: Message):
     )
 
 
-# Handlers for reply keyboard buttons
-@router.message(F.text.in_([
-    "🌐 Change Language", "🌐 Сменить язык", "🌐 Змінити мову"
-]))
-async def button_change_language(message: Message):
+# Main menu buttons, dispatched by handlers.buttons
+async def button_change_language(message: Message, state: FSMContext, lang: str, tz: str):
     """Handle 'Change Language' button press"""
-    await cmd_language(message)
+    await cmd_language(message, lang)
 
 
-@router.message(F.text.in_([
-    "❓ Help", "❓ Помощь", "❓ Допомога"
-]))
-async def button_help(message: Message):
+async def button_help(message: Message, state: FSMContext, lang: str, tz: str):
     """Handle 'Help' button press"""
-    await cmd_help(message)
\ No newline at end of file
+    await cmd_help(message, lang)
\ No newline at end of file
@@ -0,0 +1,38 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+from bot.utils import async_storage as storage
+from bot.utils.outbox import get_outbox
+from bot.utils.timezones import get_zone_table, zone_table_ready
+
+
+class UserProfileMiddleware(BaseMiddleware):
+    """Load user profile once per update and pass it to handlers.
+
+    Handlers receive ``lang`` and ``tz`` keyword arguments, so they never
+    read profile data from storage themselves. A user who writes to the bot
+    is reachable again, so the chat is unblocked and the scheduler hands
+    over reminders it parked for it on its next pass.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        
+        if user is not None:
+            profile = await storage.get_user_profile(user.id)
+            data["lang"] = profile.language
+            data["tz"] = profile.timezone
+            if not zone_table_ready(profile.timezone):
+                # Zone outside TIMEZONES: build its table off the event loop
+                await storage.run_blocking(get_zone_table, profile.timezone)
+            
+            outbox = get_outbox()
+            if outbox.is_blocked(user.id):
+                await storage.run_blocking(outbox.unblock_chat, user.id)
+        
+        return await handler(event, data)
\ No newline at end of file
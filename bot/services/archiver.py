@@ -0,0 +1,28 @@
+import asyncio
+import logging
+from bot.config import ARCHIVE_RETENTION_DAYS, ARCHIVE_INTERVAL_SECONDS
+from bot.services.metrics import metrics
+from bot.utils import async_storage as storage
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_loop(
+    retention_days: float = ARCHIVE_RETENTION_DAYS,
+    interval: float = ARCHIVE_INTERVAL_SECONDS
+):
+    """Background task that moves old sent reminders to the archive.
+
+    Runs in the polling process only, so several scheduler workers never
+    archive the same reminders.
+    """
+    logger.info(f"Archiving sent reminders older than {retention_days:g} days")
+    while True:
+        try:
+            archived = await storage.archive_sent_reminders(retention_days * 86400)
+            if archived:
+                metrics.incr("reminders_archived", archived)
+                logger.info(f"Archived {archived} sent reminders")
+        except Exception as e:
+            logger.error(f"Error archiving sent reminders: {e}", exc_info=True)
+        await asyncio.sleep(interval)
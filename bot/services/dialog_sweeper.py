@@ -0,0 +1,25 @@
+import asyncio
+import logging
+from bot.config import DIALOG_TTL_SECONDS, DIALOG_SWEEP_SECONDS
+from bot.services.metrics import metrics
+from bot.utils import async_storage as storage
+
+logger = logging.getLogger(__name__)
+
+
+async def dialog_sweep_loop(interval: float = DIALOG_SWEEP_SECONDS):
+    """Background task that drops reminder dialogs abandoned by users.
+
+    Expired dialogs are already invisible to handlers, the sweep only
+    frees their memory and removes them from the dialog file.
+    """
+    logger.info(f"Dropping reminder dialogs idle for {DIALOG_TTL_SECONDS:g} seconds")
+    while True:
+        try:
+            expired = await storage.expire_dialogs()
+            if expired:
+                metrics.incr("dialogs_expired", expired)
+                logger.info(f"Dropped {expired} abandoned dialogs")
+        except Exception as e:
+            logger.error(f"Error dropping abandoned dialogs: {e}", exc_info=True)
+        await asyncio.sleep(interval)
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from aiogram.exceptions import TelegramRetryAfter
+from bot.config import DISPATCH_WORKERS, DISPATCH_GLOBAL_RATE, DISPATCH_CHAT_RATE
+from bot.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket refilled with ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token if available, otherwise return seconds to wait"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Give out no tokens for ``seconds`` (e.g. after flood control)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    def is_idle(self) -> bool:
+        """Check whether bucket is full again and can be dropped"""
+        now = time.monotonic()
+        self._refill(now)
+        return now >= self._paused_until and self._tokens >= self.capacity
+
+
+class NotificationDispatcher:
+    """Bounded worker pool that sends notifications within Telegram limits.
+
+    A global token bucket keeps the bot under the overall message rate, a
+    per-chat bucket under the per-chat rate. Jobs for a chat that is out of
+    tokens or under flood control (``TelegramRetryAfter``) are deferred, so
+    workers keep serving other chats meanwhile.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any], Awaitable[Any]],
+        workers: int = DISPATCH_WORKERS,
+        global_rate: float = DISPATCH_GLOBAL_RATE,
+        chat_rate: float = DISPATCH_CHAT_RATE,
+        queue_size: int = 1000
+    ):
+        self._send = send
+        self._workers_count = workers
+        self._global = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_rate = chat_rate
+        self._chats: Dict[int, TokenBucket] = {}
+        self._queue: "asyncio.Queue[Tuple[int, Any]]" = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._deferred: Set[asyncio.TimerHandle] = set()
+        self._requeues: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Start worker tasks"""
+        self._loop = asyncio.get_running_loop()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"dispatcher-{i}")
+            for i in range(self._workers_count)
+        ]
+
+    async def stop(self) -> None:
+        """Stop workers, dropping queued jobs"""
+        for handle in self._deferred:
+            handle.cancel()
+        self._deferred.clear()
+        tasks = self._workers + list(self._requeues)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, chat_id: int, job: Any) -> None:
+        """Queue job for chat (waits while queue is full)"""
+        await self._queue.put((chat_id, job))
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                # Forget chats that are not rate limited anymore
+                self._chats = {cid: b for cid, b in self._chats.items() if not b.is_idle()}
+            bucket = TokenBucket(self._chat_rate)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _defer(self, chat_id: int, job: Any, delay: float) -> None:
+        """Put job back into queue after ``delay`` seconds"""
+        handle: Optional[asyncio.TimerHandle] = None
+
+        def requeue() -> None:
+            self._deferred.discard(handle)
+            try:
+                self._queue.put_nowait((chat_id, job))
+            except asyncio.QueueFull:
+                task = asyncio.create_task(self.submit(chat_id, job))
+                self._requeues.add(task)
+                task.add_done_callback(self._requeues.discard)
+
+        handle = self._loop.call_later(delay, requeue)
+        self._deferred.add(handle)
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id, job = await self._queue.get()
+            try:
+                bucket = self._chat_bucket(chat_id)
+                wait = bucket.reserve()
+                if wait > 0:
+                    self._defer(chat_id, job, wait)
+                    continue
+
+                await self._global.acquire()
+                try:
+                    await self._send(job)
+                except TelegramRetryAfter as e:
+                    # Flood control hit: pause only this chat and retry later
+                    logger.warning(f"Flood control for chat {chat_id}, retry in {e.retry_after}s")
+                    metrics.incr("dispatch_retry_after")
+                    bucket.pause(e.retry_after)
+                    self._defer(chat_id, job, e.retry_after)
+            except Exception as e:
+                logger.error(f"Error dispatching job for chat {chat_id}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
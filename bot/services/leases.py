@@ -0,0 +1,152 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Set, Tuple
+
+from bot.config import DATA_DIR, SCHEDULER_PARTITIONS, SCHEDULER_LEASE_SECONDS, WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+
+LEASES_FILE = os.path.join(DATA_DIR, "leases.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    partition   INTEGER PRIMARY KEY,
+    owner       TEXT,
+    expires_at  REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id     TEXT PRIMARY KEY,
+    heartbeat_at  REAL NOT NULL
+);
+"""
+
+
+class LeaseManager:
+    """Splits reminder partitions between scheduler processes with leases.
+
+    Users are mapped to ``partitions`` buckets by user id. Every worker
+    heartbeats into a shared SQLite file and holds short leases on its fair
+    share of partitions. Leases are renewed every ``ttl / 3`` seconds; when
+    a worker dies its leases expire and live workers take them over.
+    """
+
+    def __init__(self, path: str, worker_id: str, partitions: int, ttl: float = 30):
+        self.path = path
+        self.worker_id = worker_id
+        self.partitions = partitions
+        self.ttl = ttl
+        self.owned: Set[int] = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO leases (partition) VALUES (?)",
+            [(p,) for p in range(partitions)]
+        )
+
+    def partition_of(self, user_id: int) -> int:
+        """Partition that holds reminders of user"""
+        return user_id % self.partitions
+
+    def owns(self, user_id: int) -> bool:
+        """Check whether this worker is responsible for user"""
+        return self.partition_of(user_id) in self.owned
+
+    def renew(self) -> Tuple[Set[int], Set[int]]:
+        """Heartbeat, renew own leases and rebalance.
+
+        Returns (gained, lost) partitions since the previous call.
+        """
+        now = time.time()
+        expires_at = now + self.ttl
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO workers (worker_id, heartbeat_at) VALUES (?, ?)",
+                    (self.worker_id, now)
+                )
+                self._conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (now - self.ttl,))
+                live = self._conn.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+                target = math.ceil(self.partitions / max(live, 1))
+
+                owned = {
+                    row[0] for row in self._conn.execute(
+                        "SELECT partition FROM leases WHERE owner = ? AND expires_at >= ?",
+                        (self.worker_id, now)
+                    )
+                }
+
+                # Give away partitions above fair share so new workers get some
+                extra = sorted(owned)[target:]
+                self._conn.executemany(
+                    "UPDATE leases SET owner = NULL, expires_at = 0 WHERE partition = ? AND owner = ?",
+                    [(p, self.worker_id) for p in extra]
+                )
+                owned.difference_update(extra)
+
+                if len(owned) < target:
+                    free = [
+                        row[0] for row in self._conn.execute(
+                            "SELECT partition FROM leases WHERE owner IS NULL OR expires_at < ? "
+                            "ORDER BY partition LIMIT ?",
+                            (now, target - len(owned))
+                        )
+                    ]
+                    owned.update(free)
+
+                self._conn.executemany(
+                    "UPDATE leases SET owner = ?, expires_at = ? WHERE partition = ?",
+                    [(self.worker_id, expires_at, p) for p in owned]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            gained = owned - self.owned
+            lost = self.owned - owned
+            self.owned = owned
+
+        if gained or lost:
+            logger.info(
+                f"Worker {self.worker_id} owns {len(owned)}/{self.partitions} partitions "
+                f"(+{len(gained)} -{len(lost)}, {live} live workers)"
+            )
+        return gained, lost
+
+    def release_all(self) -> None:
+        """Give up all leases (on clean shutdown)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE leases SET owner = NULL, expires_at = 0 WHERE owner = ?",
+                (self.worker_id,)
+            )
+            self._conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            self.owned = set()
+
+    def close(self) -> None:
+        """Close database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_lease_manager() -> Optional[LeaseManager]:
+    """Lease manager for this process, None when running a single scheduler"""
+    if not SCHEDULER_PARTITIONS:
+        return None
+    return LeaseManager(LEASES_FILE, WORKER_ID, SCHEDULER_PARTITIONS, SCHEDULER_LEASE_SECONDS)
@@ -0,0 +1,34 @@
+import threading
+from typing import Dict
+
+
+class Metrics:
+    """Simple in-process counters for background services"""
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increase counter"""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def observe_max(self, name: str, value: float) -> None:
+        """Keep the largest observed value"""
+        with self._lock:
+            if value > self._values.get(name, 0):
+                self._values[name] = value
+
+    def get(self, name: str) -> float:
+        """Get current counter value"""
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Get copy of all counters"""
+        with self._lock:
+            return dict(self._values)
+
+
+metrics = Metrics()
\ No newline at end of file
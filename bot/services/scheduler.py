@@ -1,81 +1,620 @@
 import asyncio
+import heapq
 import logging
-from datetime import datetime
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from aiogram import Bot
-from bot.utils.storage import get_all_pending_reminders, mark_reminder_sent, get_user_language
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+)
+from bot.config import SCHEDULER_GRACE_SECONDS, SCHEDULER_CATCHUP_SECONDS, SCHEDULER_WINDOW_SECONDS
+from bot.services.dispatcher import NotificationDispatcher
+from bot.services.leases import LeaseManager
+from bot.services.metrics import metrics
+from bot.utils import async_storage as storage
+from bot.utils.outbox import Outbox, get_outbox
+from bot.utils.storage import add_listener, remove_listener
+from bot.utils.models import Reminder
 from bot.utils.localization import get_text
+from bot.utils.timezones import get_zone_table, local_date_time, zone_table_ready
 
 logger = logging.getLogger(__name__)
 
+# Sleep never crosses a wall-clock minute boundary, so clock jumps are
+# noticed within a minute and wake-ups stay aligned to due times
+TICK_SECONDS = 60
 
-async def check_and_send_reminders(bot: Bot):
-    """Check all pending reminders and send notifications if time has come"""
-    try:
-        pending_reminders = get_all_pending_reminders()
-        current_time = datetime.now()
-        
-        for user_id, reminder in pending_reminders:
+# How often delivered reminders are committed as sent
+ACK_COMMIT_SECONDS = 1.0
+
+# Reminders added by other processes may be due up to a minute before
+# they are written (minute precision), polling looks back that far
+POLL_LOOKBACK_SECONDS = 60
+
+
+def classify_error(error: Exception) -> Tuple[bool, bool]:
+    """Tell (permanent, block_chat) for a failed send.
+
+    Permanent errors are not retried, block_chat means the chat itself is
+    unreachable (e.g. the user blocked the bot).
+    """
+    if isinstance(error, TelegramForbiddenError):
+        return True, True
+    if isinstance(error, TelegramBadRequest):
+        return True, "chat not found" in str(error).lower()
+    if isinstance(error, TelegramNotFound):
+        return True, False
+    return False, False
+
+
+class SentAcks:
+    """Collects delivered reminders and marks them as sent in batches.
+
+    A reminder is acknowledged only after Telegram accepted the message,
+    and acknowledgements are committed in one storage write per interval
+    and once more on shutdown. A crash can re-send at most the deliveries
+    of the last interval and never loses a reminder. Committed reminders
+    are then removed from the outbox.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        interval: float = ACK_COMMIT_SECONDS,
+        max_batch: int = 500,
+        on_commit: Optional[Callable[[List[Tuple[int, int]]], None]] = None
+    ):
+        self.outbox = outbox
+        self.interval = interval
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self._items: List[Tuple[int, int]] = []
+        self._full = asyncio.Event()
+
+    def add(self, user_id: int, reminder_id: int) -> None:
+        """Remember delivered reminder"""
+        self._items.append((user_id, reminder_id))
+        if len(self._items) >= self.max_batch:
+            self._full.set()
+
+    async def commit(self) -> None:
+        """Mark collected reminders as sent in one write"""
+        items, self._items = self._items, []
+        self._full.clear()
+        if not items:
+            return
+        try:
+            await storage.mark_reminders_sent(items)
+            await storage.run_blocking(self.outbox.complete_many, items)
+            metrics.incr("ack_commits")
+        except Exception:
+            # Keep them for next attempt
+            self._items[:0] = items
+            raise
+        if self.on_commit is not None:
+            self.on_commit(items)
+
+    async def run(self) -> None:
+        """Commit acknowledgements every interval, forever"""
+        while True:
             try:
-                # Parse reminder datetime
-                reminder_datetime = datetime.strptime(
-                    reminder["datetime"], 
-                    "%Y-%m-%d %H:%M"
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.commit()
+            except Exception as e:
+                logger.error(f"Error committing sent reminders: {e}", exc_info=True)
+
+
+class ReminderScheduler:
+    """Min-heap of pending reminders keyed by UTC due time (epoch seconds).
+
+    The scheduler sleeps exactly until the earliest reminder is due and is
+    woken early when storage reports a change of the queue head, so the work
+    per wake-up depends only on the number of due reminders. Due reminders
+    are handed to a NotificationDispatcher which sends them concurrently
+    within Telegram rate limits, through a durable Outbox so failed sends
+    are retried with backoff instead of being lost.
+
+    Only reminders due within ``window_seconds`` are held in memory. The
+    window is refilled from the store's due index when half of it has
+    passed, and storage changes beyond its end are left for the refill, so
+    memory depends on the reminders due per window, not on all stored.
+
+    Due reminders of chats that blocked the bot are parked in memory and
+    handed over once the chat is unblocked (the user wrote to the bot
+    again), unless they were deleted or rescheduled meanwhile.
+
+    Every reminder with ``due <= now`` is delivered, no matter how late.
+    Deliveries more than ``grace_seconds`` after the due time are counted
+    as late. On start, overdue reminders are caught up in due-time order;
+    with ``catchup_seconds`` set, older ones are dropped instead.
+
+    With a LeaseManager several scheduler processes share one SQLite store:
+    each handles only users of the partitions it leases, polls storage for
+    reminders added by other processes and takes over jobs left in the
+    outbox by workers that died. The outbox primary key makes enqueueing
+    idempotent, so a reminder is handed to a dispatcher only once.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        grace_seconds: int = SCHEDULER_GRACE_SECONDS,
+        catchup_seconds: int = SCHEDULER_CATCHUP_SECONDS,
+        leases: Optional[LeaseManager] = None,
+        window_seconds: int = SCHEDULER_WINDOW_SECONDS
+    ):
+        self.bot = bot
+        self.grace_seconds = grace_seconds
+        self.catchup_seconds = catchup_seconds
+        self.leases = leases
+        self.window_seconds = window_seconds
+        self._heap: List[Tuple[int, int, int]] = []  # (due_ts, user_id, reminder_id)
+        self._entries: Dict[Tuple[int, int], Tuple[int, Reminder]] = {}
+        self._window_end = 0  # Queue holds every owned reminder due before this
+        self._window_lock = asyncio.Lock()
+        # Storage changes reported while a window is being read
+        self._buffered: Optional[List[tuple]] = None
+        self._polled_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.outbox = get_outbox()
+        self.dispatcher = NotificationDispatcher(self._deliver)
+        self._inflight: Set[Tuple[int, int]] = set()  # Jobs handed to dispatcher
+        # Jobs committed recently: storage reads started before the commit
+        # may still report them as pending
+        self._committed: Dict[Tuple[int, int], float] = {}
+        self.acks = SentAcks(self.outbox, on_commit=self._on_commit)
+        self._retry_wakeup = asyncio.Event()
+        # Due jobs of blocked chats: user_id -> reminder_id -> job
+        self._parked: Dict[int, Dict[int, Tuple[int, Reminder, int]]] = {}
+
+    def owns(self, user_id: int) -> bool:
+        """Check whether this scheduler is responsible for user"""
+        return self.leases is None or self.leases.owns(user_id)
+
+    def _partition_args(self) -> Tuple[int, Optional[Set[int]]]:
+        """Outbox filter arguments for owned partitions"""
+        if self.leases is None:
+            return 0, None
+        return self.leases.partitions, set(self.leases.owned)
+
+    def _on_commit(self, keys: List[Tuple[int, int]]) -> None:
+        now = time.monotonic()
+        self._inflight.difference_update(keys)
+        self._committed.update((key, now) for key in keys)
+        if len(self._committed) > 2 * len(keys) + 1000:
+            self._committed = {
+                key: at for key, at in self._committed.items() if now - at < TICK_SECONDS
+            }
+
+    def _busy(self, user_id: int, reminder_id: int) -> bool:
+        """Check whether job is in delivery or was delivered moments ago"""
+        key = (user_id, reminder_id)
+        if key in self._inflight:
+            return True
+        at = self._committed.get(key)
+        return at is not None and time.monotonic() - at < TICK_SECONDS
+
+    async def _submit(self, job: Tuple[int, Reminder, int]) -> None:
+        self._inflight.add((job[0], job[1].id))
+        await self.dispatcher.submit(job[0], job)
+
+    # ---- queue maintenance (event loop thread only) ----
+
+    def schedule(self, user_id: int, reminder: Reminder) -> None:
+        """Add reminder to queue, waking scheduler if it is the new head"""
+        if not self.owns(user_id):
+            return
+        due_ts = reminder.due
+        self._entries[(user_id, reminder.id)] = (due_ts, reminder)
+        heapq.heappush(self._heap, (due_ts, user_id, reminder.id))
+
+        if self._heap[0] == (due_ts, user_id, reminder.id):
+            self._wakeup.set()
+
+    def unschedule(self, user_id: int, reminder_id: int) -> None:
+        """Remove reminder from queue (heap entry is dropped lazily)"""
+        entry = self._entries.pop((user_id, reminder_id), None)
+        if entry is None:
+            return
+
+        if self._heap and self._heap[0] == (entry[0], user_id, reminder_id):
+            self._wakeup.set()
+
+        # Rebuild heap once stale entries dominate it
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (due_ts, uid, rid) for (uid, rid), (due_ts, _) in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> List[Tuple[int, Reminder, int]]:
+        """Pop all reminders due at ``now``"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_ts, user_id, reminder_id = heapq.heappop(self._heap)
+            entry = self._entries.get((user_id, reminder_id))
+            if entry is None or entry[0] != due_ts:
+                continue  # Deleted or rescheduled
+            del self._entries[(user_id, reminder_id)]
+            due.append((user_id, entry[1], due_ts))
+        return due
+
+    def _next_timeout(self) -> float:
+        # Skip stale heads so we don't wake up for deleted reminders
+        while self._heap and self._heap[0][1:] not in self._entries:
+            heapq.heappop(self._heap)
+
+        now = time.time()
+        timeout = TICK_SECONDS - now % TICK_SECONDS  # Next wall-clock boundary
+        timeout = min(timeout, self._window_end - self.window_seconds / 2 - now)  # Next refill
+        if self._heap:
+            timeout = min(timeout, self._heap[0][0] - now)
+        return max(timeout, 0)
+
+    # ---- storage notifications (any thread) ----
+
+    def _on_storage_event(
+        self, event: str, user_id: int, reminder_id: int, reminder: Optional[Reminder]
+    ) -> None:
+        self._loop.call_soon_threadsafe(self._apply_event, event, user_id, reminder_id, reminder)
+
+    def _apply_event(
+        self, event: str, user_id: int, reminder_id: int, reminder: Optional[Reminder]
+    ) -> None:
+        if self._buffered is not None:
+            # Applied once the window being read is in the queue
+            self._buffered.append((event, user_id, reminder_id, reminder))
+            return
+
+        # A parked job is outdated by any change of its reminder
+        parked = self._parked.get(user_id)
+        if parked is not None:
+            parked.pop(reminder_id, None)
+            if not parked:
+                del self._parked[user_id]
+
+        # "next": recurring reminder fired and moved to its next occurrence,
+        # "move": rescheduled after the user changed timezone
+        if event in ("add", "next", "move") and reminder.due < self._window_end:
+            self.schedule(user_id, reminder)
+        else:
+            # Gone, or due after the window (picked up by a later refill)
+            self.unschedule(user_id, reminder_id)
+
+    # ---- due window ----
+
+    async def _read_window(self, start: int, end: int) -> Tuple[List[Tuple[int, Reminder]], List[tuple]]:
+        """Read reminders due in [start, end) and changes reported meanwhile"""
+        self._buffered = []
+        try:
+            due = await storage.get_due_between(start, end)
+        finally:
+            events, self._buffered = self._buffered, None
+        return [
+            (user_id, reminder) for user_id, reminder in due
+            if self.owns(user_id) and not self._busy(user_id, reminder.id)
+        ], events
+
+    async def load(self) -> None:
+        """Fill queue with pending reminders due before the end of the window"""
+        async with self._window_lock:
+            end = int(time.time()) + self.window_seconds
+            due, events = await self._read_window(0, end)
+
+            self._entries = {(uid, r.id): (r.due, r) for uid, r in due}
+            # Parked jobs of users no longer owned are parked again by their new owner
+            self._parked = {uid: jobs for uid, jobs in self._parked.items() if self.owns(uid)}
+            self._heap = [(r.due, uid, r.id) for uid, r in due]
+            heapq.heapify(self._heap)
+            self._window_end = end
+            for event in events:
+                self._apply_event(*event)
+
+        self._wakeup.set()
+        logger.info(f"Scheduler loaded {len(self._entries)} reminders due in next {self.window_seconds}s")
+
+    async def refill(self) -> None:
+        """Extend the window to ``window_seconds`` ahead of now"""
+        async with self._window_lock:
+            start = self._window_end
+            end = int(time.time()) + self.window_seconds
+            if end <= start:
+                return
+            due, events = await self._read_window(start, end)
+
+            for user_id, reminder in due:
+                if (user_id, reminder.id) not in self._entries:
+                    self.schedule(user_id, reminder)
+            self._window_end = end
+            for event in events:
+                self._apply_event(*event)
+        logger.debug(f"Scheduler window extended by {len(due)} reminders")
+
+    async def recover(self, claimed_before: Optional[float] = None) -> None:
+        """Resume deliveries that were in flight when their worker stopped"""
+        partition_count, partitions = self._partition_args()
+        jobs = await storage.run_blocking(
+            self.outbox.unfinished, partition_count, partitions, claimed_before
+        )
+        jobs = [job for job in jobs if not self._busy(job[0], job[1].id)]
+        if not jobs:
+            return
+
+        resumed, finished = [], []
+        for user_id, reminder, due_ts in jobs:
+            current = await storage.get_reminder(user_id, reminder.id)
+            if current is not None and not current.sent and current.due == due_ts:
+                resumed.append((user_id, reminder, due_ts))
+            else:
+                # Sent, deleted or moved to next occurrence before the
+                # outbox row was removed
+                finished.append((user_id, reminder.id))
+
+        await storage.run_blocking(self.outbox.complete_many, finished)
+        logger.info(f"Resuming {len(resumed)} unfinished deliveries from outbox")
+        for job in resumed:
+            await self._submit(job)
+
+    async def catch_up(self) -> None:
+        """Send reminders that came due while the bot was down, oldest first"""
+        now = time.time()
+        overdue = self._pop_due(now)
+        if not overdue:
+            return
+
+        logger.info(f"Catching up {len(overdue)} overdue reminders")
+        jobs = self._drop_expired(overdue, now)
+        metrics.incr("reminders_caught_up", await self.enqueue(jobs))
+
+    def _drop_expired(
+        self, jobs: List[Tuple[int, Reminder, int]], now: float
+    ) -> List[Tuple[int, Reminder, int]]:
+        """Jobs still worth sending, older than ``catchup_seconds`` are acknowledged unsent"""
+        if not self.catchup_seconds:
+            return jobs
+        kept = []
+        for user_id, reminder, due_ts in jobs:
+            if now - due_ts > self.catchup_seconds:
+                # Too old to be useful, drop it from pending work
+                logger.warning(
+                    f"Dropping expired reminder {reminder.id} of user {user_id} "
+                    f"scheduled for {reminder.datetime}"
                 )
-                
-                # Check if it's time to send (within current minute)
-                if (reminder_datetime.year == current_time.year and
-                    reminder_datetime.month == current_time.month and
-                    reminder_datetime.day == current_time.day and
-                    reminder_datetime.hour == current_time.hour and
-                    reminder_datetime.minute == current_time.minute):
-                    
-                    # Get user language
-                    lang = get_user_language(user_id)
-                    
-                    # Prepare notification message
-                    message_text = get_text(lang, "reminder_notification").format(
-                        text=reminder["text"],
-                        date=reminder["date"],
-                        time=reminder["time"]
-                    )
-                    
-                    # Send notification
-                    await bot.send_message(
-                        chat_id=user_id,
-                        text=message_text,
-                        parse_mode="HTML"
-                    )
-                    
-                    # Mark reminder as sent
-                    mark_reminder_sent(user_id, reminder["id"])
-                    
-                    logger.info(
-                        f"Reminder sent to user {user_id}: '{reminder['text']}' "
-                        f"scheduled for {reminder['datetime']}"
-                    )
-                    
+                self.acks.add(user_id, reminder.id)
+                metrics.incr("reminders_expired")
+                continue
+            kept.append((user_id, reminder, due_ts))
+        return kept
+
+    async def release_parked(self) -> None:
+        """Enqueue parked jobs of chats that were unblocked"""
+        users = [user_id for user_id in self._parked if not self.outbox.is_blocked(user_id)]
+        if not users:
+            return
+
+        jobs = []
+        for user_id in users:
+            for job in self._parked.pop(user_id).values():
+                # Deleted or moved by another process meanwhile?
+                current = await storage.get_reminder(user_id, job[1].id)
+                if current is not None and not current.sent and current.due == job[2]:
+                    jobs.append(job)
+        logger.info(f"Resuming {len(jobs)} reminders of {len(users)} unblocked chats")
+        await self.enqueue(self._drop_expired(jobs, time.time()))
+
+    async def enqueue(self, jobs: List[Tuple[int, Reminder, int]]) -> int:
+        """Persist due jobs in outbox and hand new ones to dispatcher"""
+        ready = []
+        for job in jobs:
+            if self.outbox.is_blocked(job[0]):
+                # Kept until the user writes to the bot again
+                self._parked.setdefault(job[0], {})[job[1].id] = job
+            else:
+                ready.append(job)
+        jobs = ready
+        if not jobs:
+            return 0
+
+        # Jobs already in outbox are being delivered or retried
+        added = await storage.run_blocking(self.outbox.enqueue_many, jobs)
+        for job in added:
+            await self._submit(job)
+        return len(added)
+
+    async def poll_due(self, now: float) -> None:
+        """Enqueue due reminders added to shared storage by other processes"""
+        start = int(min(self._polled_at, now)) - POLL_LOOKBACK_SECONDS
+        pending = await storage.get_due_between(max(start, 0), int(now) + 1)
+        self._polled_at = now
+        await self.enqueue([
+            (user_id, reminder, reminder.due)
+            for user_id, reminder in pending
+            if self.owns(user_id) and not self._busy(user_id, reminder.id)
+        ])
+
+    async def lease_loop(self) -> None:
+        """Renew partition leases and take over work of dead workers"""
+        while True:
+            await asyncio.sleep(self.leases.ttl / 3)
+            try:
+                gained, lost = await storage.run_blocking(self.leases.renew)
+                if gained or lost:
+                    await self.load()
+                # Jobs claimed longer than a lease ago by a worker that is gone
+                await self.recover(claimed_before=time.time() - self.leases.ttl)
             except Exception as e:
-                logger.error(
-                    f"Error sending reminder to user {user_id}: {e}",
-                    exc_info=True
+                logger.error(f"Error renewing scheduler leases: {e}", exc_info=True)
+
+    async def run(self) -> None:
+        """Send reminders as they become due, forever"""
+        self._loop = asyncio.get_running_loop()
+        add_listener(self._on_storage_event)
+        self.dispatcher.start()
+        acks_task = asyncio.create_task(self.acks.run())
+        retry_task = asyncio.create_task(self.retry_loop())
+        lease_task = None
+        try:
+            if self.leases is not None:
+                await storage.run_blocking(self.leases.renew)
+                lease_task = asyncio.create_task(self.lease_loop())
+                # Only jobs old enough that their worker must have died
+                await self.recover(claimed_before=time.time() - self.leases.ttl)
+            else:
+                await self.recover()
+            await self.load()
+            await self.catch_up()
+
+            while True:
+                self._wakeup.clear()
+
+                now = time.time()
+                if now + self.window_seconds / 2 >= self._window_end:
+                    await self.refill()
+                await self.enqueue(self._pop_due(now))
+                await self.release_parked()
+                if self.leases is not None:
+                    await self.poll_due(now)
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._next_timeout())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            remove_listener(self._on_storage_event)
+            tasks = [t for t in (retry_task, lease_task) if t is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.dispatcher.stop()
+            acks_task.cancel()
+            await asyncio.gather(acks_task, return_exceptions=True)
+            # Commit what was delivered before stopping
+            await self.acks.commit()
+            if self.leases is not None:
+                # Let other workers take over right away
+                await storage.run_blocking(self.leases.release_all)
+
+    async def retry_loop(self) -> None:
+        """Hand outbox jobs to dispatcher once their backoff expires"""
+        while True:
+            self._retry_wakeup.clear()
+            try:
+                jobs = await storage.run_blocking(
+                    self.outbox.claim_due_retries, time.time(), *self._partition_args()
                 )
-                
-    except Exception as e:
-        logger.error(f"Error in check_and_send_reminders: {e}", exc_info=True)
+                for job in jobs:
+                    await self._submit(job)
 
+                next_at = await storage.run_blocking(self.outbox.next_retry_at)
+            except Exception as e:
+                logger.error(f"Error in outbox retry loop: {e}", exc_info=True)
+                next_at = None
+
+            timeout = TICK_SECONDS
+            if next_at is not None:
+                timeout = min(max(next_at - time.time(), 0), TICK_SECONDS)
+            try:
+                await asyncio.wait_for(self._retry_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, job: Tuple[int, Reminder, int]) -> None:
+        user_id, reminder, due_ts = job
+        if not self.owns(user_id):
+            # Partition moved to another worker, which resumes it from outbox
+            self._inflight.discard((user_id, reminder.id))
+            return
+        try:
+            await self.send_reminder(user_id, reminder, due_ts)
+        except TelegramRetryAfter:
+            # Dispatcher pauses this chat and retries
+            raise
+        except Exception as e:
+            await self._handle_failure(user_id, reminder, e)
+
+    async def _handle_failure(self, user_id: int, reminder: Reminder, error: Exception) -> None:
+        """Retry transient failures, dead-letter permanent ones"""
+        permanent, block_chat = classify_error(error)
+        self._inflight.discard((user_id, reminder.id))
+
+        if not permanent:
+            metrics.incr("reminders_failed")
+            next_at = await storage.run_blocking(
+                self.outbox.retry, user_id, reminder.id, str(error)
+            )
+            if next_at is not None:
+                logger.warning(
+                    f"Error sending reminder to user {user_id}: {error}, "
+                    f"retry in {next_at - time.time():.0f}s"
+                )
+                self._retry_wakeup.set()
+                return
+        else:
+            await storage.run_blocking(self.outbox.dead, user_id, reminder.id, str(error))
+
+        logger.error(f"Giving up reminder {reminder.id} of user {user_id}: {error}")
+        metrics.incr("reminders_dead")
+        # Stop scheduling it, dead letter stays in outbox
+        self.acks.add(user_id, reminder.id)
+
+        if block_chat:
+            logger.warning(f"Chat {user_id} is unreachable, pausing its reminders")
+            metrics.incr("chats_blocked")
+            await storage.run_blocking(self.outbox.block_chat, user_id, str(error))
 
-async def reminder_scheduler(bot: Bot):
-    """Background task that runs every minute to check reminders"""
+    async def send_reminder(self, user_id: int, reminder: Reminder, due_ts: int) -> None:
+        """Send notification for single reminder and acknowledge it"""
+        # Get user language and timezone
+        profile = await storage.get_user_profile(user_id)
+        lang = profile.language
+        if not zone_table_ready(profile.timezone):
+            await storage.run_blocking(get_zone_table, profile.timezone)
+
+        # Prepare notification message (due time as the user entered it)
+        local_date, local_time = local_date_time(due_ts, profile.timezone)
+        message_text = get_text(lang, "reminder_notification").format(
+            text=reminder.text,
+            date=local_date,
+            time=local_time
+        )
+
+        # Send notification
+        await self.bot.send_message(
+            chat_id=user_id,
+            text=message_text,
+            parse_mode="HTML"
+        )
+
+        # Mark reminder as sent (committed with the next batch)
+        self.acks.add(user_id, reminder.id)
+
+        lateness = time.time() - due_ts
+        metrics.incr("reminders_sent")
+        if lateness > self.grace_seconds:
+            metrics.incr("reminders_late")
+            metrics.observe_max("reminders_late_max_seconds", lateness)
+
+        logger.info(
+            f"Reminder sent to user {user_id}: '{reminder.text}' "
+            f"scheduled for {reminder.datetime}"
+        )
+
+
+async def reminder_scheduler(bot: Bot, leases: Optional[LeaseManager] = None):
+    """Background task that sends reminders when they are due"""
     logger.info("Reminder scheduler started")
-    
+
     while True:
         try:
-            await check_and_send_reminders(bot)
-            
-            # Wait for 60 seconds before next check
-            await asyncio.sleep(60)
-            
+            await ReminderScheduler(bot, leases=leases).run()
+
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Error in reminder_scheduler loop: {e}", exc_info=True)
-            # Wait before retrying
-            await asyncio.sleep(60)
\ No newline at end of file
+            # Wait before restarting with a fresh queue
+            await asyncio.sleep(60)
@@ -5,4 +5,5 @@ class ReminderStates(StatesGroup):
     """FSM states for reminder creation"""
     waiting_for_text = State()
     waiting_for_date = State()
-    waiting_for_time = State()
\ No newline at end of file
+    waiting_for_time = State()
+    waiting_for_repeat = State()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import gzip
+import json
+import logging
+import os
+import zlib
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from bot.utils.models import Reminder, utc_date_time
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderArchive:
+    """Sent reminders moved out of the live store, one file per month.
+
+    Segments are named ``YYYY-MM.jsonl.gz`` after the UTC month the
+    reminder was due in and hold ``[user_id, record]`` lines. Every
+    ``append`` adds one gzip member to the end of a segment, so its cost
+    does not grow with the month. A member torn by a crash is cut off
+    before the first append to that segment in the next process (readers
+    skip it until then). Reads only open segments overlapping the
+    requested time range.
+
+    A reminder may be archived twice if the process stops between writing
+    the archive and removing it from the live store; readers skip repeats
+    (reminder ids are never reused).
+    """
+
+    SUFFIX = ".jsonl.gz"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._checked: Set[str] = set()  # Segments with a verified tail
+
+    def _segment_path(self, month: str) -> str:
+        return os.path.join(self.directory, month + self.SUFFIX)
+
+    def append(self, items: List[Tuple[int, Reminder]]) -> int:
+        """Write (user_id, reminder) pairs to their monthly segments"""
+        by_month: Dict[str, List[str]] = {}
+        for user_id, reminder in items:
+            month = utc_date_time(reminder.due)[0][:7]
+            line = json.dumps([user_id, reminder.to_record()], ensure_ascii=False, separators=(",", ":"))
+            by_month.setdefault(month, []).append(line)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for month, lines in sorted(by_month.items()):
+            path = self._segment_path(month)
+            member = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+            if path not in self._checked:
+                self._drop_torn_tail(path)
+                self._checked.add(path)
+            with open(path, "ab") as f:
+                size = f.tell()
+                try:
+                    f.write(member)
+                    f.flush()
+                    os.fsync(f.fileno())
+                except BaseException:
+                    # Do not leave half a member for the next one to follow
+                    f.truncate(size)
+                    raise
+        return len(items)
+
+    @staticmethod
+    def _drop_torn_tail(path: str) -> None:
+        """Cut segment after its last complete gzip member"""
+        if not os.path.exists(path):
+            return
+        good = 0  # End of the last complete member
+        fed = 0  # Bytes of the current member read so far
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        with open(path, "rb") as f:
+            data = b""
+            while True:
+                if not data:
+                    data = f.read(1 << 16)
+                    if not data:
+                        break
+                try:
+                    decompressor.decompress(data)
+                except zlib.error:
+                    break
+                if decompressor.eof:
+                    good += fed + len(data) - len(decompressor.unused_data)
+                    fed = 0
+                    data = decompressor.unused_data
+                    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                else:
+                    fed += len(data)
+                    data = b""
+
+        size = os.path.getsize(path)
+        if good < size:
+            with open(path, "r+b") as f:
+                f.truncate(good)
+                f.flush()
+                os.fsync(f.fileno())
+            logger.warning(f"Dropped {size - good} bytes of incomplete archive segment tail in {path}")
+
+    def months(self, since: Optional[int] = None, until: Optional[int] = None) -> List[str]:
+        """Archived months (``YYYY-MM``) overlapping [since, until], oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        first = utc_date_time(since)[0][:7] if since is not None else None
+        last = utc_date_time(until)[0][:7] if until is not None else None
+        return sorted(
+            name[:-len(self.SUFFIX)] for name in os.listdir(self.directory)
+            if name.endswith(self.SUFFIX)
+            and (first is None or name[:7] >= first)
+            and (last is None or name[:7] <= last)
+        )
+
+    def _read_segment(self, month: str) -> Iterator[Tuple[int, Reminder]]:
+        path = self._segment_path(month)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    user_id, record = json.loads(line)
+                    yield user_id, Reminder.from_record(record)
+        except (EOFError, zlib.error, json.JSONDecodeError, gzip.BadGzipFile) as e:
+            # Torn last member, cut off by the next append
+            logger.warning(f"Ignoring damaged tail of archive segment {path}: {e}")
+
+    def iter_reminders(
+        self,
+        user_id: Optional[int] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None
+    ) -> Iterator[Tuple[int, Reminder]]:
+        """Archived (user_id, reminder) pairs due in [since, until], by month"""
+        for month in self.months(since, until):
+            seen = set()
+            for owner, reminder in self._read_segment(month):
+                if user_id is not None and owner != user_id:
+                    continue
+                if since is not None and reminder.due < since:
+                    continue
+                if until is not None and reminder.due > until:
+                    continue
+                if (owner, reminder.id) in seen:
+                    continue
+                seen.add((owner, reminder.id))
+                yield owner, reminder
+
+    def user_history(
+        self,
+        user_id: int,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Reminder]:
+        """Archived reminders of one user, most recent first"""
+        history = [r for _, r in self.iter_reminders(user_id, since, until)]
+        history.sort(key=lambda r: r.due, reverse=True)
+        return history[:limit] if limit is not None else history
@@ -0,0 +1,177 @@
+"""Async facade over bot.utils.storage for use inside handlers.
+
+Blocking storage calls run on a dedicated thread pool so disk I/O never
+stalls the event loop. Writes of one user are serialized with a per-user
+lock, so they reach the store in the order they were issued.
+"""
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from bot.utils import storage
+from bot.utils.models import Reminder, UserProfile
+
+T = TypeVar("T")
+
+STORAGE_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_user_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=STORAGE_WORKERS,
+            thread_name_prefix="storage"
+        )
+    return _executor
+
+
+def _user_lock(user_id: int) -> asyncio.Lock:
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _user_locks[user_id] = lock
+    return lock
+
+
+async def _run(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run blocking storage call on storage executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(),
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+async def _write(user_id: int, func: Callable[..., T], *args, **kwargs) -> T:
+    """Run storage write keeping per-user ordering"""
+    async with _user_lock(user_id):
+        return await _run(func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run other blocking disk work (e.g. outbox) on storage executor"""
+    return await _run(func, *args, **kwargs)
+
+
+def shutdown() -> None:
+    """Wait for queued storage calls and stop executor"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def get_user_data(user_id: int) -> Dict:
+    """Get user data from storage"""
+    return await _run(storage.get_user_data, user_id)
+
+
+async def get_user_profile(user_id: int) -> UserProfile:
+    """Get user language and timezone, without thread hop on cache hit"""
+    profile = storage.profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+    return await _run(storage.get_user_profile, user_id)
+
+
+async def set_user_language(user_id: int, language: str) -> None:
+    """Set user language preference"""
+    await _write(user_id, storage.set_user_language, user_id, language)
+
+
+async def get_user_language(user_id: int) -> str:
+    """Get user language from storage"""
+    return (await get_user_profile(user_id)).language
+
+
+async def add_reminder(
+    user_id: int,
+    text: str,
+    due: int,
+    repeat: Optional[str] = None,
+    tz: Optional[str] = None
+) -> Reminder:
+    """Add new reminder due at UTC epoch seconds (``repeat`` is a cron rule in ``tz``)"""
+    return await _write(user_id, storage.add_reminder, user_id, text, due, repeat, tz)
+
+
+async def get_user_reminders(user_id: int, active_only: bool = True) -> List[Reminder]:
+    """Get all reminders for user"""
+    return await _run(storage.get_user_reminders, user_id, active_only=active_only)
+
+
+async def get_sorted_reminders(user_id: int) -> Tuple[Reminder, ...]:
+    """Active reminders ordered by due time, without thread hop on cache hit"""
+    reminders = storage.reminder_lists.get(user_id)
+    if reminders is not None:
+        return reminders
+    return await _run(storage.get_sorted_reminders, user_id)
+
+
+async def get_reminder(user_id: int, reminder_id: int) -> Optional[Reminder]:
+    """Get single reminder by ID, None if missing"""
+    return await _run(storage.get_reminder, user_id, reminder_id)
+
+
+async def delete_reminder(user_id: int, reminder_id: int) -> bool:
+    """Delete reminder by ID"""
+    return await _write(user_id, storage.delete_reminder, user_id, reminder_id)
+
+
+async def mark_reminder_sent(user_id: int, reminder_id: int) -> bool:
+    """Mark reminder as sent"""
+    return await _write(user_id, storage.mark_reminder_sent, user_id, reminder_id)
+
+
+async def mark_reminders_sent(items: List[Tuple[int, int]]) -> int:
+    """Mark many reminders as sent in one storage write.
+
+    Marking as sent is idempotent, so this is not serialized per user.
+    """
+    return await _run(storage.mark_reminders_sent, items)
+
+
+async def get_all_pending_reminders(due_before: Optional[int] = None) -> List[Tuple[int, Reminder]]:
+    """Get all pending reminders from all users (for background task)"""
+    return await _run(storage.get_all_pending_reminders, due_before=due_before)
+
+
+async def get_due_between(start: int, end: int) -> List[Tuple[int, Reminder]]:
+    """Get pending reminders with ``start <= due < end``, ordered by due time"""
+    return await _run(lambda: list(storage.iter_due_between(start, end)))
+
+
+async def get_user_timezone(user_id: int) -> str:
+    """Get user timezone from storage"""
+    return (await get_user_profile(user_id)).timezone
+
+
+async def set_user_timezone(user_id: int, timezone: str) -> None:
+    """Set user timezone preference"""
+    await _write(user_id, storage.set_user_timezone, user_id, timezone)
+
+
+async def archive_sent_reminders(older_than: float) -> int:
+    """Move reminders sent more than ``older_than`` seconds ago to archive"""
+    return await _run(storage.archive_sent_reminders, older_than)
+
+
+async def get_archived_reminders(
+    user_id: int,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Reminder]:
+    """Archived reminders of user, most recent first"""
+    return await _run(storage.get_archived_reminders, user_id, since, until, limit)
+
+
+async def expire_dialogs() -> int:
+    """Drop abandoned FSM dialogs"""
+    return await _run(storage.expire_dialogs)
@@ -0,0 +1,185 @@
+"""Compact binary snapshot of user data (standard library only).
+
+Layout, all integers little-endian:
+
+    header   magic "DRTB", format version u16, flags u16, journal seq u64,
+             body length u32, CRC-32 of body u32
+    body     strings   - languages, timezones and repeat rules, each once
+             users     - columns: user_id, language, timezone, next_id, count
+             reminders - columns: id, due, created, sent, repeat, tz, text
+
+Every column is one ``array`` (u32 length prefix + items), strings are a
+column of character lengths followed by one UTF-8 blob. Columns are read
+with ``array.frombytes`` and texts with a single decode, so loading costs
+little more than creating the model objects.
+"""
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Tuple
+
+from bot.utils.files import atomic_write
+from bot.utils.models import Reminder, UserData, UserProfile
+
+MAGIC = b"DRTB"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHHQII")
+LENGTH = struct.Struct("<I")
+
+_SWAP = sys.byteorder == "big"
+
+for _typecode, _size in (("B", 1), ("i", 4), ("I", 4), ("q", 8)):
+    if array(_typecode).itemsize != _size:
+        raise ImportError(f"Unsupported platform: array('{_typecode}') is not {_size} bytes")
+
+
+def _pack_array(typecode: str, values) -> bytes:
+    column = array(typecode, values)
+    if _SWAP:
+        column.byteswap()
+    return LENGTH.pack(len(column)) + column.tobytes()
+
+
+def _unpack_array(typecode: str, buf: memoryview, offset: int) -> Tuple[array, int]:
+    (count,) = LENGTH.unpack_from(buf, offset)
+    offset += LENGTH.size
+    column = array(typecode)
+    end = offset + count * column.itemsize
+    column.frombytes(buf[offset:end])
+    if _SWAP:
+        column.byteswap()
+    return column, end
+
+
+def _pack_strings(strings: List[str]) -> bytes:
+    blob = "".join(strings).encode("utf-8")
+    return _pack_array("I", map(len, strings)) + LENGTH.pack(len(blob)) + blob
+
+
+def _unpack_strings(buf: memoryview, offset: int) -> Tuple[List[str], int]:
+    lengths, offset = _unpack_array("I", buf, offset)
+    (size,) = LENGTH.unpack_from(buf, offset)
+    offset += LENGTH.size
+    text = bytes(buf[offset:offset + size]).decode("utf-8")
+
+    strings = []
+    position = 0
+    for length in lengths:
+        strings.append(text[position:position + length])
+        position += length
+    return strings, offset + size
+
+
+def dumps(state: UserData, seq: int = 0) -> bytes:
+    """Encode user data (and journal sequence) as binary snapshot"""
+    profiles, reminders, next_ids = state
+    strings: Dict[str, int] = {}
+
+    def ref(value) -> int:
+        if value is None:
+            return -1
+        return strings.setdefault(value, len(strings))
+
+    user_ids, languages, timezones, user_next_ids, counts = [], [], [], [], []
+    ids, dues, created, sent, repeats, tzs, texts = [], [], [], [], [], [], []
+    for user_id, profile in profiles.items():
+        user_reminders = reminders.get(user_id, {})
+        user_ids.append(user_id)
+        languages.append(ref(profile.language))
+        timezones.append(ref(profile.timezone))
+        user_next_ids.append(next_ids.get(user_id, 1))
+        counts.append(len(user_reminders))
+        for reminder in user_reminders.values():
+            ids.append(reminder.id)
+            dues.append(reminder.due)
+            created.append(reminder.created)
+            sent.append(reminder.sent)
+            repeats.append(ref(reminder.repeat))
+            tzs.append(ref(reminder.tz))
+            texts.append(reminder.text)
+
+    body = b"".join((
+        _pack_strings(list(strings)),
+        _pack_array("q", user_ids),
+        _pack_array("I", languages),
+        _pack_array("I", timezones),
+        _pack_array("q", user_next_ids),
+        _pack_array("I", counts),
+        _pack_array("q", ids),
+        _pack_array("q", dues),
+        _pack_array("q", created),
+        _pack_array("B", sent),
+        _pack_array("i", repeats),
+        _pack_array("i", tzs),
+        _pack_strings(texts),
+    ))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, seq, len(body), zlib.crc32(body))
+    return header + body
+
+
+def loads(data: bytes) -> Tuple[UserData, int]:
+    """Decode binary snapshot, returns user data and journal sequence.
+
+    Raises ValueError for foreign, truncated or corrupted data.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Binary snapshot is truncated")
+    magic, version, _, seq, size, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a binary snapshot")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Binary snapshot version {version} is newer than supported")
+    buf = memoryview(data)[HEADER.size:]
+    if len(buf) != size or zlib.crc32(buf) != checksum:
+        raise ValueError("Binary snapshot checksum mismatch")
+
+    offset = 0
+    strings, offset = _unpack_strings(buf, offset)
+    columns = []
+    for typecode in ("q", "I", "I", "q", "I", "q", "q", "q", "B", "i", "i"):
+        column, offset = _unpack_array(typecode, buf, offset)
+        columns.append(column)
+    texts, offset = _unpack_strings(buf, offset)
+    user_ids, languages, timezones, user_next_ids, counts, \
+        ids, dues, created, sent, repeats, tzs = columns
+
+    profiles, reminders, next_ids = {}, {}, {}
+    position = 0
+    for i, user_id in enumerate(user_ids):
+        profiles[user_id] = UserProfile(strings[languages[i]], strings[timezones[i]])
+        next_ids[user_id] = user_next_ids[i]
+        user_reminders = reminders[user_id] = {}
+        for j in range(position, position + counts[i]):
+            user_reminders[ids[j]] = Reminder(
+                ids[j],
+                texts[j],
+                dues[j],
+                created[j],
+                bool(sent[j]),
+                strings[repeats[j]] if repeats[j] >= 0 else None,
+                strings[tzs[j]] if tzs[j] >= 0 else None
+            )
+        position += counts[i]
+    return (profiles, reminders, next_ids), seq
+
+
+def is_binary_file(path: str) -> bool:
+    """Check whether file starts with binary snapshot magic"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def read_binary_file(path: str) -> Tuple[UserData, int]:
+    """Read binary snapshot file, returns user data and journal sequence"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def write_binary_file(path: str, state: UserData, seq: int = 0) -> None:
+    """Write binary snapshot atomically, previous one kept as backup"""
+    atomic_write(path, dumps(state, seq))
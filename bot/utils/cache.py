@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded LRU cache with optional expiry.
+
+    Storage keeps user profiles and sorted reminder lists in it, keyed by
+    user id. Values are returned as stored, so they should be immutable.
+
+    Thread-safe, since it is used both from the event loop and from
+    storage executor threads. With ``ttl`` set, entries expire after that
+    many seconds so changes made by other processes are picked up.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[K, Tuple[V, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped on every invalidation
+
+    def get(self, key: K) -> Optional[V]:
+        """Get cached value, None on miss"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if self.ttl and time.monotonic() >= expires_at:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def generation(self) -> int:
+        """Get invalidation counter, pass it to put() after a slow load"""
+        return self._generation
+
+    def put(self, key: K, value: V, generation: Optional[int] = None) -> None:
+        """Store value, evicting least recently used ones.
+
+        If ``generation`` is given and some value was invalidated since,
+        the (possibly stale) value is not cached.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._items[key] = (value, time.monotonic() + self.ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Drop cached value after it was changed"""
+        with self._lock:
+            self._items.pop(key, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        """Drop all cached values"""
+        with self._lock:
+            self._items.clear()
+            self._generation += 1
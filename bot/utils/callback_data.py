@@ -0,0 +1,139 @@
+import string
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple, Union
+
+from bot.utils.localization import TEXTS
+from bot.utils.recurrence import REPEAT_KINDS
+from bot.utils.timezones import TIMEZONES
+
+# Bump when opcodes, argument kinds or TIMEZONES order change, buttons of
+# older messages then decode to None instead of a wrong action
+CALLBACK_VERSION = "1"
+SEPARATOR = "."
+# Telegram limit for callback_data, in bytes
+MAX_CALLBACK_BYTES = 64
+
+# Argument kinds: "int" - base-36 number, "tz" - index of TIMEZONES entry
+# (base-36), "lang" / "repeat" - language code / repeat kind as is
+OPCODES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "L": ("lang", ("lang",)),
+    "Z": ("tz", ("tz",)),
+    "R": ("repeat", ("repeat",)),
+    "P": ("list", ("int",)),
+    "N": ("noop", ()),
+    "D": ("delete", ("int", "int")),
+    "Y": ("confirm_delete", ("int", "int")),
+    "C": ("cancel_delete", ("int", "int")),
+}
+ACTIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    action: (opcode, kinds) for opcode, (action, kinds) in OPCODES.items()
+}
+
+_DIGITS = string.digits + string.ascii_lowercase
+_TIMEZONE_INDEX = {tz_id: index for index, (tz_id, _) in enumerate(TIMEZONES)}
+# Accepted values of token kinds, anything else is a crafted or stale button
+_TOKENS: Dict[str, FrozenSet[str]] = {
+    "lang": frozenset(TEXTS),
+    "repeat": frozenset(REPEAT_KINDS),
+}
+
+Arg = Union[int, str]
+
+
+class Callback(NamedTuple):
+    """Decoded callback data: action name and typed arguments"""
+    action: str
+    args: Tuple[Arg, ...]
+
+
+def to_base36(number: int) -> str:
+    if number < 0:
+        raise ValueError(f"Negative number in callback data: {number}")
+    digits = ""
+    while True:
+        number, rest = divmod(number, 36)
+        digits = _DIGITS[rest] + digits
+        if not number:
+            return digits
+
+
+def from_base36(digits: str) -> int:
+    # int() alone would also accept signs, spaces and underscores
+    if not digits or not digits.isascii() or not digits.isalnum():
+        raise ValueError(f"Bad number in callback data: {digits!r}")
+    return int(digits, 36)
+
+
+def _encode_arg(kind: str, value: Arg) -> str:
+    if kind == "int":
+        return to_base36(value)
+    if kind == "tz":
+        return to_base36(_TIMEZONE_INDEX[value])
+    if value not in _TOKENS[kind]:
+        raise ValueError(f"Bad {kind} in callback data: {value!r}")
+    return value
+
+
+def _decode_arg(kind: str, value: str) -> Arg:
+    if kind == "int":
+        return from_base36(value)
+    if kind == "tz":
+        return TIMEZONES[from_base36(value)][0]
+    if value not in _TOKENS[kind]:
+        raise ValueError(f"Bad {kind} in callback data: {value!r}")
+    return value
+
+
+def encode_callback(action: str, *args: Arg) -> str:
+    """Compact callback data, e.g. ``encode_callback("delete", 45, 2)`` -> ``"1D19.2"``"""
+    opcode, kinds = ACTIONS[action]
+    if len(args) != len(kinds):
+        raise ValueError(f"{action} takes {len(kinds)} arguments, got {len(args)}")
+    data = CALLBACK_VERSION + opcode + SEPARATOR.join(
+        _encode_arg(kind, value) for kind, value in zip(kinds, args)
+    )
+    if len(data.encode()) > MAX_CALLBACK_BYTES:
+        raise ValueError(f"Callback data is longer than {MAX_CALLBACK_BYTES} bytes: {data!r}")
+    return data
+
+
+def decode_callback(data: Optional[str]) -> Optional[Callback]:
+    """Action and arguments of callback data, None if it is unknown or damaged"""
+    if not data:
+        return None
+    if data[0] != CALLBACK_VERSION:
+        return _decode_legacy(data)
+
+    entry = OPCODES.get(data[1:2])
+    if entry is None:
+        return None
+    action, kinds = entry
+    values = data[2:].split(SEPARATOR) if kinds else []
+    if len(values) != len(kinds) or (not kinds and len(data) > 2):
+        return None
+    try:
+        return Callback(action, tuple(_decode_arg(kind, value) for kind, value in zip(kinds, values)))
+    except (ValueError, IndexError):
+        return None
+
+
+def _decode_legacy(data: str) -> Optional[Callback]:
+    """Buttons of messages sent before callback data was versioned ("delete_5", "tz_Europe/Paris")"""
+    prefix, _, rest = data.partition("_")
+    if prefix == "lang":
+        return Callback("lang", (rest,)) if rest in _TOKENS["lang"] else None
+    if prefix == "tz":
+        return Callback("tz", (rest,)) if rest in _TIMEZONE_INDEX else None
+
+    if prefix in ("confirm", "cancel"):
+        prefix, _, rest = rest.partition("_")
+        if prefix != "delete":
+            return None
+        action = data.split("_")[0] + "_delete"
+    elif prefix == "delete":
+        action = "delete"
+    else:
+        return None
+    if not rest.isascii() or not rest.isdigit():
+        return None
+    # Those buttons had no list page, the first one is shown afterwards
+    return Callback(action, (int(rest), 0))
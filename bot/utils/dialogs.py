@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from bot.utils.store import DAMAGED_FILE_ERRORS, read_json_file, write_json_file
+
+logger = logging.getLogger(__name__)
+
+DIALOGS_VERSION = 1
+
+# (state, data, last change timestamp)
+Dialog = Tuple[Optional[str], Dict[str, Any], int]
+
+
+class DialogStore:
+    """Unfinished dialogs (FSM state and data) with periodic write-back.
+
+    Dialogs are kept in memory by key (see bot.utils.fsm_storage) and
+    written to a JSON file as ``{"version": 1, "dialogs": {key: [state,
+    data, updated]}}`` every ``flush_interval`` seconds when something
+    changed, so a restart resumes them. A dialog without state and data
+    is finished and removed.
+
+    A dialog not changed for ``ttl`` seconds is abandoned: reads ignore
+    it and ``expire()`` (called by a background sweeper) drops it, so the
+    number of dialogs stays bounded. ``ttl`` 0 keeps dialogs until they
+    finish. Dialog data must be JSON-serializable.
+    """
+
+    def __init__(self, path: str, ttl: float, flush_interval: float = 5.0):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._dialogs: Dict[str, Dialog] = {}
+        self._dirty = False
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            payload = read_json_file(self.path)
+            if payload.get("version") != DIALOGS_VERSION:
+                raise ValueError(f"unsupported version {payload.get('version')}")
+            self._dialogs = {
+                key: (state, data, updated)
+                for key, (state, data, updated) in payload["dialogs"].items()
+            }
+        except DAMAGED_FILE_ERRORS as e:
+            # Dialogs are easy to start again, not worth a recovery
+            logger.error(f"Dialog file {self.path} is damaged ({e}), unfinished dialogs are lost")
+            self._dialogs = {}
+            return
+        expired = self.expire()
+        logger.info(f"Loaded {len(self._dialogs)} unfinished dialogs ({expired} expired)")
+
+    # ---- lifecycle ----
+
+    def start(self) -> None:
+        """Start background flush thread"""
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name="dialog-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+
+    def close(self) -> None:
+        """Stop background flushing and write pending changes"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing dialogs: {e}", exc_info=True)
+
+    def flush(self) -> bool:
+        """Write dialog file if anything changed since last flush"""
+        with self._lock:
+            if not self._dirty:
+                return False
+            dialogs = {key: list(dialog) for key, dialog in self._dialogs.items()}
+            self._dirty = False
+
+        try:
+            write_json_file(self.path, {"version": DIALOGS_VERSION, "dialogs": dialogs})
+        except Exception:
+            with self._lock:
+                self._dirty = True
+            raise
+        return True
+
+    # ---- dialogs ----
+
+    def _expired(self, dialog: Dialog, now: float) -> bool:
+        return bool(self.ttl) and dialog[2] <= now - self.ttl
+
+    def get(self, key: str) -> Optional[Dialog]:
+        """Dialog by key, None if there is none or it expired"""
+        dialog = self._dialogs.get(key)
+        if dialog is None or self._expired(dialog, time.time()):
+            return None
+        return dialog
+
+    def _put(self, key: str, state: Optional[str], data: Dict[str, Any]) -> None:
+        with self._lock:
+            if state is None and not data:
+                if self._dialogs.pop(key, None) is not None:
+                    self._dirty = True
+                return
+            self._dialogs[key] = (state, data, int(time.time()))
+            self._dirty = True
+
+    def set_state(self, key: str, state: Optional[str]) -> None:
+        """Change dialog state, data of an expired dialog is dropped"""
+        dialog = self.get(key)
+        self._put(key, state, dialog[1] if dialog else {})
+
+    def set_data(self, key: str, data: Dict[str, Any]) -> None:
+        """Replace dialog data, state of an expired dialog is dropped"""
+        dialog = self.get(key)
+        self._put(key, dialog[0] if dialog else None, dict(data))
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop dialogs idle for longer than ``ttl``, return how many"""
+        if not self.ttl:
+            return 0
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [key for key, dialog in self._dialogs.items() if self._expired(dialog, now)]
+            for key in expired:
+                del self._dialogs[key]
+            if expired:
+                self._dirty = True
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._dialogs)
@@ -0,0 +1,122 @@
+import os
+import shutil
+import threading
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single process only
+    fcntl = None
+
+
+def backup_path(path: str) -> str:
+    """Where the previous version of ``path`` is kept by ``atomic_write``"""
+    return path + ".bak"
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, size, mtime) of file, None if missing.
+
+    Files written by ``atomic_write`` get a new inode each time, so a
+    changed signature means another writer replaced the file.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _fsync_directory(directory: str) -> None:
+    """Make a rename in ``directory`` durable (no-op where unsupported)"""
+    if os.name != "posix":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: bytes, backup: bool = True) -> None:
+    """Replace file contents so readers see either old or new data, never a mix.
+
+    Data goes to a temporary file in the same directory, is fsynced and
+    renamed over ``path``. With ``backup`` the replaced version stays
+    available as ``backup_path(path)`` (hard link, copied where links are
+    not supported) for recovery if the new file is damaged later.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if backup and os.path.exists(path):
+            tmp_backup = tmp_path + ".bak"
+            try:
+                os.link(path, tmp_backup)
+            except OSError:
+                shutil.copyfile(path, tmp_backup)
+            os.replace(tmp_backup, backup_path(path))
+
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _fsync_directory(directory)
+
+
+class FileLock:
+    """Advisory lock on a file shared by threads and processes.
+
+    The lock is taken on a ``.lock`` file next to ``path`` with ``flock``,
+    so ``path`` itself can be replaced while the lock is held. Threads of
+    one process are serialized by a regular lock first. Without ``fcntl``
+    (Windows) only threads are serialized.
+    """
+
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock, False if ``blocking`` is off and it is held elsewhere"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+
+        try:
+            if self._fd is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._thread_lock.release()
+            return False
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self) -> None:
+        """Release the lock"""
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,50 @@
+from typing import Any, Dict, Mapping, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from bot.utils.dialogs import DialogStore
+from bot.utils import storage
+
+
+def dialog_key(key: StorageKey) -> str:
+    """Compact dialog key: "chat:user", thread/business/destiny only when set.
+
+    The bot id is left out, a data directory belongs to one bot.
+    """
+    parts = [str(key.chat_id), str(key.user_id)]
+    if key.thread_id or key.business_connection_id or key.destiny != "default":
+        parts += [str(key.thread_id or ""), key.business_connection_id or "", key.destiny]
+    return ":".join(parts)
+
+
+class DialogStorage(BaseStorage):
+    """aiogram FSM storage kept in the bot's DialogStore.
+
+    Unfinished dialogs survive restarts and expire after
+    DIALOG_TTL_SECONDS without changes. Calls only touch memory, the
+    file is written by the store's flush thread.
+    """
+
+    def __init__(self, store: Optional[DialogStore] = None):
+        self._store = store
+
+    @property
+    def store(self) -> DialogStore:
+        return self._store or storage.get_dialog_store()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        self.store.set_state(dialog_key(key), state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        dialog = self.store.get(dialog_key(key))
+        return dialog[0] if dialog else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        self.store.set_data(dialog_key(key), dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        dialog = self.store.get(dialog_key(key))
+        return dict(dialog[1]) if dialog else {}
+
+    async def close(self) -> None:
+        # Dialog store is written and closed with the rest of storage (close_storage)
+        pass
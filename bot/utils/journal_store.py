@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from bot.utils.binary_codec import write_binary_file
+from bot.utils.files import FileLock
+from bot.utils.models import decode_data, encode_data
+from bot.utils.store import MemoryStore, read_data_file, write_json_file
+
+logger = logging.getLogger(__name__)
+
+
+class JournalStore(MemoryStore):
+    """In-memory store persisted as snapshot + append-only mutation journal.
+
+    Each mutation is appended to the journal as one compact JSON line with
+    a sequence number. Lines are buffered and written with one fsync per
+    flush interval (group commit). When the journal grows past
+    ``compact_bytes`` it is folded into a new snapshot and truncated.
+    On startup the snapshot is loaded and journal lines newer than the
+    snapshot sequence are replayed.
+
+    Journal sequence numbers are owned by one process, so the store holds
+    an inter-process lock on the journal until ``close()``; a second
+    process opening the same journal fails instead of corrupting it.
+    """
+
+    SHARED_FILE = False
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        journal_path: str,
+        flush_interval: float = 5.0,
+        compact_bytes: int = 1024 * 1024,
+        seed_path: Optional[str] = None,
+        binary: bool = False
+    ):
+        self.journal_path = journal_path
+        self.compact_bytes = compact_bytes
+        self.seed_path = seed_path
+        self._seq = 0
+        self._pending: List[str] = []
+        self._io_lock = threading.Lock()  # Serializes journal/snapshot writes
+        self._owner_lock = FileLock(journal_path)
+        if not self._owner_lock.acquire(blocking=False):
+            raise RuntimeError(f"Journal {journal_path} is used by another process")
+        try:
+            super().__init__(snapshot_path, flush_interval=flush_interval, binary=binary)
+        except Exception:
+            self._owner_lock.release()
+            raise
+
+    def close(self) -> None:
+        """Write pending ops and let other processes open the journal"""
+        try:
+            super().close()
+        finally:
+            if self._owner_lock is not None:
+                self._owner_lock.release()
+                self._owner_lock = None
+
+    # ---- loading ----
+
+    def _load(self) -> None:
+        """Load snapshot and replay journal tail"""
+        seq = 0
+        if os.path.exists(self.path):
+            # Snapshot is the data file (JSON or binary) plus journal seq
+            state, seq, _ = read_data_file(self.path)
+            self._set_state(state)
+        elif self.seed_path and os.path.exists(self.seed_path):
+            # First start in journal mode: begin from existing data file
+            self._set_state(read_data_file(self.seed_path)[0])
+            logger.info(f"Journal store seeded from {self.seed_path}")
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            good_end = 0  # Byte offset just past the last complete line
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("line is not terminated")
+                        op = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail after a crash
+                        break
+                    good_end += len(line)
+                    if op["s"] <= seq:
+                        continue  # Already folded into snapshot
+                    self._apply(op, record=False)
+                    seq = op["s"]
+                    replayed += 1
+
+            size = os.path.getsize(self.journal_path)
+            if good_end < size:
+                # Cut the torn line off, or the next append would be glued to it
+                # and every op after it lost on the following restart
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good_end)
+                    f.flush()
+                    os.fsync(f.fileno())
+                logger.warning(f"Dropped {size - good_end} bytes of incomplete journal tail")
+
+        self._seq = seq
+        self._dirty.clear()
+        logger.info(f"Journal store loaded (seq {seq}, {replayed} ops replayed)")
+
+    # ---- persistence ----
+
+    def _record(self, op: Dict) -> None:
+        """Queue op as journal line (written on next flush)"""
+        self._seq += 1
+        line = json.dumps(
+            {"s": self._seq, **op},
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        self._pending.append(line)
+
+    def flush(self) -> bool:
+        """Append queued ops to journal with one fsync, compact if needed"""
+        with self._io_lock:
+            with self._lock:
+                lines = self._pending
+                self._pending = []
+
+            if lines:
+                try:
+                    self._append(lines)
+                except Exception:
+                    # Keep ops queued for the next attempt
+                    with self._lock:
+                        self._pending[:0] = lines
+                    raise
+
+            if os.path.exists(self.journal_path) and \
+                    os.path.getsize(self.journal_path) >= self.compact_bytes:
+                self._compact()
+
+        if lines:
+            logger.debug(f"Journal flushed ({len(lines)} ops)")
+        return bool(lines)
+
+    def _append(self, lines: List[str]) -> None:
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self) -> None:
+        """Fold current state into snapshot and truncate journal.
+
+        Must be called with ``_io_lock`` held.
+        """
+        with self._lock:
+            state = self._copy_state()
+            seq = self._seq
+
+        if self.binary:
+            write_binary_file(self.path, state, seq)
+        else:
+            payload = encode_data(*state)
+            payload["seq"] = seq
+            write_json_file(self.path, payload)
+
+        # Everything already in the journal is covered by the snapshot; ops
+        # queued after the copy have higher seq and go to the fresh journal
+        open(self.journal_path, "w").close()
+        logger.info(f"Journal compacted into snapshot (seq {seq})")
+
+    def replace_all(self, data: Dict) -> None:
+        """Replace all data and write it as a fresh snapshot"""
+        state = decode_data(data)
+        with self._io_lock:
+            with self._lock:
+                self._set_state(state)
+                self._pending = []
+                self._seq += 1
+            self._compact()
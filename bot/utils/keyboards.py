@@ -1,18 +1,50 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
-from bot.utils.localization import get_text
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Union
 
+from aiogram.types import (
+    ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove,
+    InlineKeyboardMarkup, InlineKeyboardButton
+)
+from pydantic import ConfigDict
+from bot.utils.callback_data import encode_callback
+from bot.utils.localization import TEXTS, get_text
+from bot.utils.recurrence import REPEAT_KINDS
+from bot.utils.timezones import get_timezone_keyboard_data
 
-def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
+Markup = Union[ReplyKeyboardMarkup, InlineKeyboardMarkup]
+
+DEFAULT_LANGUAGE = "en"
+
+
+class FrozenReplyKeyboardMarkup(ReplyKeyboardMarkup):
+    """Reply keyboard shared by all updates, assignment raises"""
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenKeyboardButton(KeyboardButton):
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenInlineKeyboardMarkup(InlineKeyboardMarkup):
+    """Inline keyboard shared by all updates, assignment raises"""
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenInlineKeyboardButton(InlineKeyboardButton):
+    model_config = ConfigDict(frozen=True)
+
+
+def build_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
     """Create main menu reply keyboard based on user language"""
-    keyboard = ReplyKeyboardMarkup(
+    keyboard = FrozenReplyKeyboardMarkup(
         keyboard=[
             [
-                KeyboardButton(text=get_text(lang, "btn_create_reminder")),
-                KeyboardButton(text=get_text(lang, "btn_my_reminders"))
+                FrozenKeyboardButton(text=get_text(lang, "btn_create_reminder")),
+                FrozenKeyboardButton(text=get_text(lang, "btn_my_reminders"))
             ],
             [
-                KeyboardButton(text=get_text(lang, "btn_change_language")),
-                KeyboardButton(text=get_text(lang, "btn_help"))
+                FrozenKeyboardButton(text=get_text(lang, "btn_change_language")),
+                FrozenKeyboardButton(text=get_text(lang, "btn_help"))
             ]
         ],
         resize_keyboard=True,
@@ -21,17 +53,132 @@ def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
     return keyboard
 
 
-def get_cancel_keyboard(lang: str) -> ReplyKeyboardMarkup:
+def build_cancel_keyboard(lang: str) -> ReplyKeyboardMarkup:
     """Create keyboard with cancel button"""
-    keyboard = ReplyKeyboardMarkup(
+    keyboard = FrozenReplyKeyboardMarkup(
         keyboard=[
-            [KeyboardButton(text=get_text(lang, "btn_cancel"))]
+            [FrozenKeyboardButton(text=get_text(lang, "btn_cancel"))]
         ],
         resize_keyboard=True
     )
     return keyboard
 
 
+def build_repeat_keyboard(lang: str) -> InlineKeyboardMarkup:
+    """Create inline keyboard with repeat options"""
+    buttons = [
+        FrozenInlineKeyboardButton(text=get_text(lang, f"btn_repeat_{kind}"), callback_data=encode_callback("repeat", kind))
+        for kind in REPEAT_KINDS
+    ]
+    # Once on its own row, the rest 2 per row
+    rows = [buttons[:1]] + [buttons[i:i + 2] for i in range(1, len(buttons), 2)]
+    return FrozenInlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def build_language_keyboard(lang: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Create inline keyboard for language selection (same for every language)"""
+    keyboard = FrozenInlineKeyboardMarkup(inline_keyboard=[
+        [
+            FrozenInlineKeyboardButton(text="🇬🇧 English", callback_data=encode_callback("lang", "en")),
+            FrozenInlineKeyboardButton(text="🇷🇺 Русский", callback_data=encode_callback("lang", "ru")),
+            FrozenInlineKeyboardButton(text="🇺🇦 Українська", callback_data=encode_callback("lang", "ua")),
+        ]
+    ])
+    return keyboard
+
+
+def build_timezone_keyboard(lang: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Create inline keyboard for timezone selection (same for every language)"""
+    timezones = get_timezone_keyboard_data()
+
+    # 2 timezones per row
+    buttons = [
+        FrozenInlineKeyboardButton(text=tz_name, callback_data=encode_callback("tz", tz_id))
+        for tz_id, tz_name in timezones
+    ]
+    rows = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    return FrozenInlineKeyboardMarkup(inline_keyboard=rows)
+
+
+# Keyboards that only depend on the user language, by name
+STATIC_KEYBOARDS: Dict[str, Callable[[str], Markup]] = {
+    "main_menu": build_main_menu_keyboard,
+    "cancel": build_cancel_keyboard,
+    "repeat": build_repeat_keyboard,
+    "language": build_language_keyboard,
+    "timezone": build_timezone_keyboard,
+}
+
+
+def _build_registry() -> Mapping[Tuple[str, str], Markup]:
+    """Build every static keyboard for every language once.
+
+    Markups are validated here and handed out as shared frozen instances,
+    so handlers send them without constructing pydantic models per update.
+    """
+    return MappingProxyType({
+        (name, lang): build(lang)
+        for name, build in STATIC_KEYBOARDS.items()
+        for lang in TEXTS
+    })
+
+
+_KEYBOARDS = _build_registry()
+
+
+def get_keyboard(name: str, lang: str) -> Markup:
+    """Shared prebuilt keyboard, unknown languages get the English one like ``get_text``"""
+    keyboard = _KEYBOARDS.get((name, lang))
+    if keyboard is None:
+        keyboard = _KEYBOARDS[(name, DEFAULT_LANGUAGE)]
+    return keyboard
+
+
+def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    """Main menu reply keyboard in user language"""
+    return get_keyboard("main_menu", lang)
+
+
+def get_cancel_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    """Keyboard with cancel button"""
+    return get_keyboard("cancel", lang)
+
+
+def get_repeat_keyboard(lang: str) -> InlineKeyboardMarkup:
+    """Inline keyboard with repeat options"""
+    return get_keyboard("repeat", lang)
+
+
+def get_language_keyboard() -> InlineKeyboardMarkup:
+    """Inline keyboard for language selection"""
+    return get_keyboard("language", DEFAULT_LANGUAGE)
+
+
+def get_timezone_keyboard() -> InlineKeyboardMarkup:
+    """Inline keyboard for timezone selection"""
+    return get_keyboard("timezone", DEFAULT_LANGUAGE)
+
+
+def get_reminder_list_keyboard(reminder_ids: List[int], page: int, pages: int) -> InlineKeyboardMarkup:
+    """Create numbered delete buttons for a list page plus page navigation"""
+    buttons = [
+        InlineKeyboardButton(text=f"🗑 {reminder_id}", callback_data=encode_callback("delete", reminder_id, page))
+        for reminder_id in reminder_ids
+    ]
+    rows = [buttons[i:i + 5] for i in range(0, len(buttons), 5)]
+    if pages > 1:
+        # Arrows wrap around, the middle button only shows the position
+        rows.append([
+            InlineKeyboardButton(text="◀️", callback_data=encode_callback("list", (page - 1) % pages)),
+            InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data=encode_callback("noop")),
+            InlineKeyboardButton(text="▶️", callback_data=encode_callback("list", (page + 1) % pages))
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+_REMOVE_KEYBOARD = ReplyKeyboardRemove()
+
+
 def remove_keyboard() -> ReplyKeyboardRemove:
     """Remove keyboard"""
-    return ReplyKeyboardRemove()
\ No newline at end of file
+    return _REMOVE_KEYBOARD
@@ -1,3 +1,6 @@
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
 # Add new keys to existing TEXTS dictionary
 TEXTS = {
     "en": {
@@ -33,6 +36,22 @@ TEXTS = {
         "reminder_text_prompt": "📝 Enter the reminder text:\n\nExample: Call the doctor",
         "reminder_date_prompt": "📅 Enter the date (YYYY-MM-DD):\n\nExample: 2025-10-28",
         "reminder_time_prompt": "🕐 Enter the time (HH:MM):\n\nExample: 15:30",
+        "reminder_repeat_prompt": (
+            "🔁 Should the reminder repeat?\n\n"
+            "Choose below, or type weekdays (e.g. mon,wed,fri) "
+            "or a cron rule (e.g. 30 9 * * 1-5)."
+        ),
+        "invalid_repeat": "❌ Unknown repeat rule. Choose a button, type weekdays (mon,wed,fri) or a cron rule (30 9 * * 1-5).",
+        "btn_repeat_once": "1️⃣ Once",
+        "btn_repeat_daily": "📆 Daily",
+        "btn_repeat_weekdays": "💼 Weekdays",
+        "btn_repeat_weekly": "🗓 Weekly",
+        "btn_repeat_monthly": "📅 Monthly",
+        "repeat_daily": "🔁 Every day",
+        "repeat_weekdays": "🔁 On weekdays",
+        "repeat_weekly": "🔁 Weekly: {days}",
+        "repeat_monthly": "🔁 Monthly on day {day}",
+        "repeat_cron": "🔁 Rule: {rule}",
         "reminder_created": "✅ Reminder created!\n\n📝 Text: {text}\n📅 Date: {date}\n🕐 Time: {time}",
         "invalid_date_format": "❌ Invalid date format. Please use YYYY-MM-DD\n\nExample: 2025-10-28",
         "invalid_time_format": "❌ Invalid time format. Please use HH:MM\n\nExample: 15:30",
@@ -50,6 +69,8 @@ TEXTS = {
         "btn_confirm_delete": "✅ Yes, delete",
         "btn_cancel_delete": "❌ No, keep it",
         "deletion_cancelled": "✅ Deletion cancelled. Reminder kept.",
+        "list_page": "📄 Page {page} of {pages}",
+        "button_outdated": "⌛ This button is outdated, please open the menu again.",
          "select_timezone": "🌍 Select your timezone:\n\nThis will be used to send reminders at the correct time for you.",
         "timezone_changed": "✅ Timezone changed to: {timezone}",
         "current_timezone": "🌍 Your current timezone: <b>{timezone}</b>\n\nAll reminders will be sent according to this timezone.",
@@ -88,6 +109,22 @@ TEXTS = {
            "reminder_text_prompt": "📝 Введите текст напоминания:\n\nПример: Позвонить врачу",
         "reminder_date_prompt": "📅 Введите дату (YYYY-MM-DD):\n\nПример: 2025-10-28",
         "reminder_time_prompt": "🕐 Введите время (HH:MM):\n\nПример: 15:30",
+        "reminder_repeat_prompt": (
+            "🔁 Повторять напоминание?\n\n"
+            "Выберите вариант или введите дни недели (например mon,wed,fri) "
+            "или правило cron (например 30 9 * * 1-5)."
+        ),
+        "invalid_repeat": "❌ Неизвестное правило повтора. Выберите кнопку, введите дни недели (mon,wed,fri) или правило cron (30 9 * * 1-5).",
+        "btn_repeat_once": "1️⃣ Один раз",
+        "btn_repeat_daily": "📆 Каждый день",
+        "btn_repeat_weekdays": "💼 По будням",
+        "btn_repeat_weekly": "🗓 Каждую неделю",
+        "btn_repeat_monthly": "📅 Каждый месяц",
+        "repeat_daily": "🔁 Каждый день",
+        "repeat_weekdays": "🔁 По будням",
+        "repeat_weekly": "🔁 Каждую неделю: {days}",
+        "repeat_monthly": "🔁 Каждый месяц, {day} числа",
+        "repeat_cron": "🔁 Правило: {rule}",
         "reminder_created": "✅ Напоминание создано!\n\n📝 Текст: {text}\n📅 Дата: {date}\n🕐 Время: {time}",
         "invalid_date_format": "❌ Неверный формат даты. Используйте YYYY-MM-DD\n\nПример: 2025-10-28",
         "invalid_time_format": "❌ Неверный формат времени. Используйте HH:MM\n\nПример: 15:30",
@@ -105,6 +142,8 @@ TEXTS = {
         "btn_confirm_delete": "✅ Да, удалить",
         "btn_cancel_delete": "❌ Нет, оставить",
         "deletion_cancelled": "✅ Удаление отменено. Напоминание сохранено.",
+        "list_page": "📄 Страница {page} из {pages}",
+        "button_outdated": "⌛ Эта кнопка устарела, откройте меню снова.",
         "select_timezone": "🌍 Выберите ваш часовой пояс:\n\nОн будет использоваться для отправки напоминаний в правильное время.",
         "timezone_changed": "✅ Часовой пояс изменён на: {timezone}",
         "current_timezone": "🌍 Ваш текущий часовой пояс: <b>{timezone}</b>\n\nВсе напоминания будут отправлены согласно этому поясу.",
@@ -143,6 +182,22 @@ TEXTS = {
         "reminder_text_prompt": "📝 Введіть текст нагадування:\n\nПриклад: Зателефонувати лікарю",
         "reminder_date_prompt": "📅 Введіть дату (YYYY-MM-DD):\n\nПриклад: 2025-10-28",
         "reminder_time_prompt": "🕐 Введіть час (HH:MM):\n\nПриклад: 15:30",
+        "reminder_repeat_prompt": (
+            "🔁 Повторювати нагадування?\n\n"
+            "Оберіть варіант або введіть дні тижня (наприклад mon,wed,fri) "
+            "чи правило cron (наприклад 30 9 * * 1-5)."
+        ),
+        "invalid_repeat": "❌ Невідоме правило повтору. Оберіть кнопку, введіть дні тижня (mon,wed,fri) або правило cron (30 9 * * 1-5).",
+        "btn_repeat_once": "1️⃣ Один раз",
+        "btn_repeat_daily": "📆 Щодня",
+        "btn_repeat_weekdays": "💼 По буднях",
+        "btn_repeat_weekly": "🗓 Щотижня",
+        "btn_repeat_monthly": "📅 Щомісяця",
+        "repeat_daily": "🔁 Щодня",
+        "repeat_weekdays": "🔁 По буднях",
+        "repeat_weekly": "🔁 Щотижня: {days}",
+        "repeat_monthly": "🔁 Щомісяця, {day} числа",
+        "repeat_cron": "🔁 Правило: {rule}",
         "reminder_created": "✅ Нагадування створено!\n\n📝 Текст: {text}\n📅 Дата: {date}\n🕐 Час: {time}",
         "invalid_date_format": "❌ Невірний формат дати. Використовуйте YYYY-MM-DD\n\nПриклад: 2025-10-28",
         "invalid_time_format": "❌ Невірний формат часу. Використовуйте HH:MM\n\nПриклад: 15:30",
@@ -160,6 +215,8 @@ TEXTS = {
         "btn_confirm_delete": "✅ Так, видалити",
         "btn_cancel_delete": "❌ Ні, залишити",
         "deletion_cancelled": "✅ Видалення скасовано. Нагадування збережено.",
+        "list_page": "📄 Сторінка {page} з {pages}",
+        "button_outdated": "⌛ Ця кнопка застаріла, відкрийте меню знову.",
         "select_timezone": "🌍 Оберіть ваш часовий пояс:\n\nВін буде використовуватися для надсилання нагадувань у правильний час.",
         "timezone_changed": "✅ Часовий пояс змінено на: {timezone}",
         "current_timezone": "🌍 Ваш поточний часовий пояс: <b>{timezone}</b>\n\nВсі нагадування будуть надіслані згідно з цим поясом.",
@@ -168,11 +225,35 @@ TEXTS = {
     }
 }
 
+# Reply keyboard buttons, text key is "btn_<action>"
+REPLY_BUTTON_ACTIONS = ("create_reminder", "my_reminders", "change_language", "help", "cancel")
+
+
 def get_text(lang: str, key: str) -> str:
     """Get localized text by language and key"""
     return TEXTS.get(lang, TEXTS["en"]).get(key, "Text not found")
 
 
+def _build_button_index() -> Mapping[str, Tuple[str, str]]:
+    """Invert TEXTS into button text -> (action, language)"""
+    index: Dict[str, Tuple[str, str]] = {}
+    for lang, texts in TEXTS.items():
+        for action in REPLY_BUTTON_ACTIONS:
+            text = texts[f"btn_{action}"]
+            known = index.setdefault(text, (action, lang))
+            if known[0] != action:
+                raise ValueError(f"Button text {text!r} is used for {known[0]} and {action}")
+    return MappingProxyType(index)
+
+
+BUTTON_INDEX = _build_button_index()
+
+
+def find_button(text: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(action, language) of reply keyboard button with this text, None for other texts"""
+    return BUTTON_INDEX.get(text) if text else None
+
+
 def get_user_lang(user_id: int, user_languages: dict = None) -> str:
     """Get user language from storage (backward compatible)"""
     from bot.utils.storage import get_user_language
@@ -0,0 +1,44 @@
+"""One-shot migration of reminders.json (any version) into the SQLite backend.
+
+Usage:
+    python -m bot.utils.migrate [json_path] [sqlite_path]
+"""
+import logging
+import os
+import sys
+
+from bot.utils.models import encode_data
+from bot.utils.sqlite_store import SQLiteStore
+from bot.utils.store import read_data_file
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str, overwrite: bool = False) -> int:
+    """Copy all users and reminders from JSON file into SQLite database.
+
+    Returns number of migrated users. Refuses to touch a non-empty database
+    unless ``overwrite`` is set.
+    """
+    state = read_data_file(json_path)[0]
+    users = len(state[0])
+    store = SQLiteStore(sqlite_path)
+    try:
+        if not store.is_empty() and not overwrite:
+            raise RuntimeError(f"Database {sqlite_path} is not empty, use overwrite=True")
+        store.replace_all(encode_data(*state))
+    finally:
+        store.close()
+
+    logger.info(f"Migrated {users} users from {json_path} to {sqlite_path}")
+    return users
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    data_dir = os.getenv("DATA_DIR", "data")
+    json_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(data_dir, "reminders.json")
+    sqlite_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "reminders.db")
+
+    migrate_json_to_sqlite(json_path, sqlite_path)
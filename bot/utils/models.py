@@ -0,0 +1,239 @@
+import calendar
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+# On-disk layout of user data (JSON file, journal snapshot):
+#   version 1 - {"<user_id>": {"language", "timezone", "reminders": [{...}]}}
+#   version 2 - {"version": 2, "users": {"<user_id>": [language, timezone, [record, ...], next_id]}}
+# where a record is [id, text, due, created, sent] plus [repeat, tz] for
+# recurring reminders and next_id is the user's next reminder id (IDs are
+# never reused). Version 1 files are converted on load.
+DATA_VERSION = 2
+
+
+def due_timestamp(date: str, time: str) -> int:
+    """Convert UTC date and time strings to epoch seconds"""
+    due = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+    return calendar.timegm(due.timetuple())
+
+
+@lru_cache(maxsize=4096)
+def utc_date_time(ts: int) -> Tuple[str, str]:
+    """Convert epoch seconds to UTC date and time strings"""
+    due = datetime.utcfromtimestamp(ts)
+    return due.strftime("%Y-%m-%d"), due.strftime("%H:%M")
+
+
+def _parse_created(created_at: str) -> int:
+    try:
+        created = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return 0
+    return calendar.timegm(created.timetuple())
+
+
+class UserProfile:
+    """User language and timezone (interned codes). Treat as immutable."""
+
+    __slots__ = ("language", "timezone")
+
+    def __init__(self, language: str = "en", timezone: str = "UTC"):
+        self.language = sys.intern(language)
+        self.timezone = sys.intern(timezone)
+
+    def replace(self, **changes) -> "UserProfile":
+        """Copy with some fields changed"""
+        return UserProfile(
+            changes.get("language", self.language),
+            changes.get("timezone", self.timezone)
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"language": self.language, "timezone": self.timezone}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UserProfile) and \
+            (self.language, self.timezone) == (other.language, other.timezone)
+
+    def __repr__(self) -> str:
+        return f"UserProfile({self.language!r}, {self.timezone!r})"
+
+
+DEFAULT_PROFILE = UserProfile()
+
+
+class Reminder:
+    """Single reminder, due time in UTC epoch seconds.
+
+    Instances are shared between the store and its readers, so they are
+    never changed in place: ``replace()`` returns an updated copy. Display
+    strings (``date``, ``time``, ``datetime``) are derived on access.
+    """
+
+    __slots__ = ("id", "text", "due", "created", "sent", "repeat", "tz")
+
+    def __init__(
+        self,
+        id: int,
+        text: str,
+        due: int,
+        created: int = 0,
+        sent: bool = False,
+        repeat: Optional[str] = None,
+        tz: Optional[str] = None
+    ):
+        self.id = id
+        self.text = text
+        self.due = due
+        self.created = created
+        self.sent = sent
+        self.repeat = repeat or None
+        self.tz = sys.intern(tz) if repeat and tz else None
+
+    def replace(self, **changes) -> "Reminder":
+        """Copy with some fields changed"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return Reminder(**fields)
+
+    # ---- derived display values ----
+
+    @property
+    def date(self) -> str:
+        return utc_date_time(self.due)[0]
+
+    @property
+    def time(self) -> str:
+        return utc_date_time(self.due)[1]
+
+    @property
+    def datetime(self) -> str:
+        return f"{self.date} {self.time}"
+
+    @property
+    def created_at(self) -> str:
+        return datetime.utcfromtimestamp(self.created).strftime("%Y-%m-%d %H:%M:%S")
+
+    # ---- serialization ----
+
+    def to_record(self) -> List:
+        """Compact list form used on disk (version 2)"""
+        record = [self.id, self.text, self.due, self.created, int(self.sent)]
+        if self.repeat:
+            record += [self.repeat, self.tz]
+        return record
+
+    @classmethod
+    def from_record(cls, record: Union[List, Dict]) -> "Reminder":
+        """Build from version 2 record or version 1 dict"""
+        if isinstance(record, dict):
+            return cls.from_dict(record)
+        return cls(*record[:4], bool(record[4]), *record[5:7])
+
+    def to_dict(self) -> Dict:
+        """Version 1 dict layout"""
+        data = {
+            "id": self.id,
+            "text": self.text,
+            "date": self.date,
+            "time": self.time,
+            "datetime": self.datetime,
+            "created_at": self.created_at,
+            "is_sent": self.sent
+        }
+        if self.repeat:
+            data["repeat"] = self.repeat
+            data["tz"] = self.tz
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Reminder":
+        """Build from version 1 dict (date/time strings)"""
+        return cls(
+            id=data["id"],
+            text=data["text"],
+            due=due_timestamp(data["date"], data["time"]),
+            created=_parse_created(data.get("created_at")),
+            sent=bool(data.get("is_sent", False)),
+            repeat=data.get("repeat"),
+            tz=data.get("tz")
+        )
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Reminder) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return f"Reminder(id={self.id}, due={self.due}, text={self.text!r})"
+
+
+Profiles = Dict[int, UserProfile]
+# Reminders by user id, then by reminder id (ids ascend in insertion order)
+Reminders = Dict[int, Dict[int, Reminder]]
+# Next reminder id of every user
+NextIds = Dict[int, int]
+UserData = Tuple[Profiles, Reminders, NextIds]
+
+
+def _by_id(reminders: List[Reminder]) -> Dict[int, Reminder]:
+    return {r.id: r for r in sorted(reminders, key=lambda r: r.id)}
+
+
+def _first_free_id(reminders: Dict[int, Reminder]) -> int:
+    return max(reminders, default=0) + 1
+
+
+def decode_data(payload: Dict) -> UserData:
+    """Read user data in any supported on-disk layout"""
+    profiles: Profiles = {}
+    reminders: Reminders = {}
+    next_ids: NextIds = {}
+
+    if "version" in payload and "users" in payload:
+        for user_id_str, user in payload["users"].items():
+            user_id = int(user_id_str)
+            profiles[user_id] = UserProfile(user[0], user[1])
+            reminders[user_id] = _by_id([Reminder.from_record(r) for r in user[2]])
+            next_ids[user_id] = max(
+                user[3] if len(user) > 3 else 1,
+                _first_free_id(reminders[user_id])
+            )
+        return profiles, reminders, next_ids
+
+    # Version 1
+    for user_id_str, user in payload.items():
+        user_id = int(user_id_str)
+        profiles[user_id] = UserProfile(user.get("language", "en"), user.get("timezone", "UTC"))
+        reminders[user_id] = _by_id([Reminder.from_dict(r) for r in user.get("reminders", [])])
+        next_ids[user_id] = _first_free_id(reminders[user_id])
+    return profiles, reminders, next_ids
+
+
+def encode_data(profiles: Profiles, reminders: Reminders, next_ids: NextIds) -> Dict:
+    """Write user data in current on-disk layout"""
+    return {
+        "version": DATA_VERSION,
+        "users": {
+            str(user_id): [
+                profile.language,
+                profile.timezone,
+                [r.to_record() for r in reminders.get(user_id, {}).values()],
+                next_ids.get(user_id, 1)
+            ]
+            for user_id, profile in profiles.items()
+        }
+    }
+
+
+def export_data(profiles: Profiles, reminders: Reminders) -> Dict:
+    """User data in version 1 dict layout (legacy load_data API)"""
+    return {
+        str(user_id): {
+            **profile.to_dict(),
+            "reminders": [r.to_dict() for r in reminders.get(user_id, {}).values()]
+        }
+        for user_id, profile in profiles.items()
+    }
@@ -0,0 +1,342 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from bot.config import DATA_DIR, OUTBOX_MAX_ATTEMPTS, OUTBOX_BASE_DELAY, OUTBOX_MAX_DELAY
+from bot.utils.models import Reminder
+
+logger = logging.getLogger(__name__)
+
+
+OUTBOX_FILE = os.path.join(DATA_DIR, "outbox.db")
+
+# Blocked chats written by other processes (scheduler workers block, the
+# polling process unblocks) are re-read in the background this often
+BLOCKED_REFRESH_SECONDS = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    user_id          INTEGER NOT NULL,
+    reminder_id      INTEGER NOT NULL,
+    payload          TEXT NOT NULL,
+    due_at           INTEGER NOT NULL,
+    status           TEXT NOT NULL DEFAULT 'pending',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at  REAL NOT NULL,
+    last_error       TEXT,
+    PRIMARY KEY (user_id, reminder_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_status
+    ON outbox (status, next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS blocked_chats (
+    user_id     INTEGER PRIMARY KEY,
+    reason      TEXT,
+    blocked_at  REAL NOT NULL
+);
+"""
+
+# Row statuses: "pending" - being delivered, "retry" - waiting for backoff,
+# "dead" - gave up (dead letter). Delivered rows are deleted. Payload is
+# the reminder record (older rows hold the version 1 reminder dict).
+Job = Tuple[int, Reminder, int]  # (user_id, reminder, due_ts)
+
+
+def _partition_filter(partition_count: int, partitions: Optional[Set[int]]) -> Tuple[str, list]:
+    """SQL condition limiting rows to users of given partitions"""
+    if not partition_count or partitions is None:
+        return "", []
+    marks = ", ".join("?" * len(partitions))
+    return f" AND user_id % ? IN ({marks})", [partition_count, *sorted(partitions)]
+
+
+class Outbox:
+    """Durable queue of due notifications with retries and dead letters.
+
+    Due reminders are enqueued before the first delivery attempt, so a
+    crash or a failed send never loses them. Transient failures are retried
+    with exponential backoff and jitter, after ``max_attempts`` the job is
+    moved to dead letters. Chats that failed permanently (bot blocked) are
+    remembered and skipped until the user talks to the bot again. The
+    blocked set is kept in memory, so ``is_blocked`` is safe to call on
+    the event loop; after ``start()`` a background thread re-reads it
+    every ``blocked_refresh`` seconds to see changes made by other
+    processes sharing the file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        base_delay: float = OUTBOX_BASE_DELAY,
+        max_delay: float = OUTBOX_MAX_DELAY,
+        blocked_refresh: float = BLOCKED_REFRESH_SECONDS
+    ):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.blocked_refresh = blocked_refresh
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        self._blocked: Set[int] = set()
+        self.refresh_blocked()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start background refresh of blocked chats"""
+        if self._refresher is not None:
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name="outbox-blocked-refresher",
+            daemon=True
+        )
+        self._refresher.start()
+
+    def close(self) -> None:
+        """Stop background refresh and close database connection"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before next attempt: exponential with equal jitter"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _job_from_row(row: sqlite3.Row) -> Job:
+        return row["user_id"], Reminder.from_record(json.loads(row["payload"])), row["due_at"]
+
+    # ---- queue ----
+
+    def enqueue_many(self, jobs: List[Job]) -> List[Job]:
+        """Add due jobs in one transaction, return those not queued before.
+
+        A dead letter of an earlier occurrence of a recurring reminder is
+        replaced by the new occurrence.
+        """
+        now = time.time()
+        added = []
+        with self._lock, self._conn:
+            for user_id, reminder, due_ts in jobs:
+                cursor = self._conn.execute(
+                    "INSERT INTO outbox "
+                    "(user_id, reminder_id, payload, due_at, next_attempt_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, reminder_id) DO UPDATE SET "
+                    "payload = excluded.payload, due_at = excluded.due_at, status = 'pending', "
+                    "attempts = 0, next_attempt_at = excluded.next_attempt_at, last_error = NULL "
+                    "WHERE outbox.status = 'dead' AND outbox.due_at != excluded.due_at",
+                    (user_id, reminder.id, json.dumps(reminder.to_record(), ensure_ascii=False), due_ts, now)
+                )
+                if cursor.rowcount > 0:
+                    added.append((user_id, reminder, due_ts))
+        return added
+
+    def complete_many(self, keys: List[Tuple[int, int]]) -> None:
+        """Remove delivered jobs"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM outbox WHERE user_id = ? AND reminder_id = ? AND status != 'dead'",
+                keys
+            )
+
+    def retry(self, user_id: int, reminder_id: int, error: str) -> Optional[float]:
+        """Schedule another attempt after transient failure.
+
+        Returns time of next attempt, or None if the job became a dead letter.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT attempts FROM outbox WHERE user_id = ? AND reminder_id = ?",
+                (user_id, reminder_id)
+            ).fetchone()
+            if row is None:
+                return None
+
+            attempts = row["attempts"] + 1
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? "
+                    "WHERE user_id = ? AND reminder_id = ?",
+                    (attempts, error, user_id, reminder_id)
+                )
+                return None
+
+            next_attempt_at = time.time() + self.backoff(attempts)
+            self._conn.execute(
+                "UPDATE outbox SET status = 'retry', attempts = ?, next_attempt_at = ?, "
+                "last_error = ? WHERE user_id = ? AND reminder_id = ?",
+                (attempts, next_attempt_at, error, user_id, reminder_id)
+            )
+            return next_attempt_at
+
+    def dead(self, user_id: int, reminder_id: int, error: str) -> None:
+        """Move job to dead letters right away (permanent failure)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'dead', attempts = attempts + 1, last_error = ? "
+                "WHERE user_id = ? AND reminder_id = ?",
+                (error, user_id, reminder_id)
+            )
+
+    def claim_due_retries(
+        self,
+        now: float,
+        partition_count: int = 0,
+        partitions: Optional[Set[int]] = None
+    ) -> List[Job]:
+        """Take jobs whose backoff has expired and mark them in delivery.
+
+        With ``partitions`` only jobs of users in those partitions are taken.
+        """
+        condition, params = _partition_filter(partition_count, partitions)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT user_id, reminder_id, payload, due_at FROM outbox "
+                f"WHERE status = 'retry' AND next_attempt_at <= ?{condition} "
+                "ORDER BY next_attempt_at",
+                (now, *params)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'pending' WHERE user_id = ? AND reminder_id = ?",
+                [(row["user_id"], row["reminder_id"]) for row in rows]
+            )
+            return [self._job_from_row(row) for row in rows]
+
+    def next_retry_at(self) -> Optional[float]:
+        """Time of the earliest scheduled retry"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'retry'"
+            ).fetchone()
+            return row[0]
+
+    def unfinished(
+        self,
+        partition_count: int = 0,
+        partitions: Optional[Set[int]] = None,
+        claimed_before: Optional[float] = None
+    ) -> List[Job]:
+        """Jobs that were in delivery when the process stopped.
+
+        ``claimed_before`` skips jobs taken into delivery later than that
+        moment, which may still be in flight in a live worker.
+        """
+        condition, params = _partition_filter(partition_count, partitions)
+        if claimed_before is not None:
+            condition += " AND next_attempt_at < ?"
+            params.append(claimed_before)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, reminder_id, payload, due_at FROM outbox "
+                f"WHERE status = 'pending'{condition} ORDER BY due_at",
+                params
+            ).fetchall()
+            return [self._job_from_row(row) for row in rows]
+
+    def dead_letters(self, limit: int = 100) -> List[Dict]:
+        """Most recent dead letters with failure reasons"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, reminder_id, payload, due_at, attempts, last_error "
+                "FROM outbox WHERE status = 'dead' ORDER BY due_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+            return [
+                {
+                    "user_id": row["user_id"],
+                    "reminder": Reminder.from_record(json.loads(row["payload"])).to_dict(),
+                    "due_at": row["due_at"],
+                    "attempts": row["attempts"],
+                    "error": row["last_error"]
+                }
+                for row in rows
+            ]
+
+    # ---- blocked chats ----
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.blocked_refresh):
+            try:
+                self.refresh_blocked()
+            except Exception as e:
+                logger.error(f"Error reading blocked chats: {e}", exc_info=True)
+
+    def refresh_blocked(self) -> None:
+        """Re-read blocked chats from the database (blocking)"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._blocked = {
+                row[0] for row in self._conn.execute("SELECT user_id FROM blocked_chats")
+            }
+
+    def is_blocked(self, user_id: int) -> bool:
+        """Check whether chat failed permanently (in-memory lookup)"""
+        return user_id in self._blocked
+
+    def block_chat(self, user_id: int, reason: str) -> None:
+        """Stop delivering to chat until it is unblocked"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blocked_chats (user_id, reason, blocked_at) VALUES (?, ?, ?)",
+                (user_id, reason, time.time())
+            )
+            self._blocked.add(user_id)
+
+    def unblock_chat(self, user_id: int) -> None:
+        """Resume delivering to chat"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM blocked_chats WHERE user_id = ?", (user_id,))
+            self._blocked.discard(user_id)
+
+
+_outbox: Optional[Outbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """Get process-wide outbox (created on first use, open it at startup
+    through the storage executor so the event loop never waits for it)"""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox(OUTBOX_FILE)
+                _outbox.start()
+    return _outbox
+
+
+def close_outbox() -> None:
+    """Close process-wide outbox"""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is not None:
+            _outbox.close()
+            _outbox = None
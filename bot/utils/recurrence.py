@@ -0,0 +1,181 @@
+import calendar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+
+from bot.utils.timezones import get_zone_table
+
+# Repeat rules are stored as cron expressions (minute hour day month weekday)
+# in the user's timezone. Only the next occurrence is kept as the reminder's
+# date/time, further ones are computed when it fires.
+
+WEEKDAY_NAMES = ("sun", "mon", "tue", "wed", "thu", "fri", "sat")  # cron numbering
+
+REPEAT_KINDS = ("once", "daily", "weekdays", "weekly", "monthly")
+
+# Longest gap between two occurrences (Feb 29 rules)
+MAX_LOOKAHEAD_DAYS = 366 * 4 + 1
+
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+class CronRule(NamedTuple):
+    """Parsed cron expression"""
+    minutes: Tuple[int, ...]
+    hours: Tuple[int, ...]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]  # 0 = Sunday
+    any_day: bool
+    any_weekday: bool
+
+    def matches_day(self, day: date) -> bool:
+        """Check whether rule fires on given (local) day"""
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        # Like cron: restricted day and weekday match either one
+        return day_ok or weekday_ok
+
+
+def _parse_value(value: str, field: int) -> int:
+    if field == 4 and value.lower() in WEEKDAY_NAMES:
+        return WEEKDAY_NAMES.index(value.lower())
+    return int(value)
+
+
+def _parse_field(text: str, field: int) -> FrozenSet[int]:
+    low, high = FIELD_RANGES[field]
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in '{text}'")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, field), _parse_value(end_text, field)
+        else:
+            start = end = _parse_value(part, field)
+
+        if not low <= start <= end <= high:
+            raise ValueError(f"Value out of range in '{text}'")
+        values.update(range(start, end + 1, step))
+
+    if field == 4 and 7 in values:
+        values.discard(7)
+        values.add(0)
+    return frozenset(values)
+
+
+@lru_cache(maxsize=4096)
+def parse_cron(expression: str) -> CronRule:
+    """Parse cron expression (``*``, ranges, lists, steps, weekday names).
+
+    Raises ValueError for invalid expressions.
+    """
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError("Cron expression needs 5 fields")
+
+    minutes, hours, days, months, weekdays = (
+        _parse_field(text, i) for i, text in enumerate(fields)
+    )
+    return CronRule(
+        minutes=tuple(sorted(minutes)),
+        hours=tuple(sorted(hours)),
+        days=days,
+        months=months,
+        weekdays=weekdays,
+        any_day=fields[2] == "*",
+        any_weekday=fields[4] == "*"
+    )
+
+
+def next_occurrence(expression: str, tz_name: Optional[str], after_ts: int) -> Optional[int]:
+    """First time (UTC epoch seconds) after ``after_ts`` the rule fires.
+
+    Work is bounded by the days scanned until the next match, not by the
+    number of future occurrences. None if the rule never fires.
+    """
+    rule = parse_cron(expression)
+    table = get_zone_table(tz_name)
+
+    # Local clock as "wall" seconds, candidates are compared on that clock
+    start = table.to_local(after_ts) // 60 * 60 + 60
+    day = datetime.utcfromtimestamp(start).date()
+
+    for _ in range(MAX_LOOKAHEAD_DAYS):
+        if rule.matches_day(day):
+            day_start = calendar.timegm(day.timetuple())
+            for hour in rule.hours:
+                for minute in rule.minutes:
+                    candidate = day_start + hour * 3600 + minute * 60
+                    if candidate < start:
+                        continue
+                    ts = table.to_utc(candidate)
+                    if ts > after_ts:
+                        return ts
+        day += timedelta(days=1)
+    return None
+
+
+def preset_rule(kind: str, local_dt: datetime) -> Optional[str]:
+    """Cron expression for a dialog preset at the chosen local date/time"""
+    prefix = f"{local_dt.minute} {local_dt.hour}"
+    if kind == "once":
+        return None
+    if kind == "daily":
+        return f"{prefix} * * *"
+    if kind == "weekdays":
+        return f"{prefix} * * 1-5"
+    if kind == "weekly":
+        return f"{prefix} * * {(local_dt.weekday() + 1) % 7}"
+    if kind == "monthly":
+        return f"{prefix} {local_dt.day} * *"
+    raise ValueError(f"Unknown repeat kind: {kind}")
+
+
+def parse_rule_text(text: str, local_dt: datetime) -> Optional[str]:
+    """Parse rule typed by user.
+
+    Accepts preset names, weekday lists (``mon,wed,fri``, fired at the
+    chosen time) and full cron expressions. Raises ValueError otherwise.
+    """
+    text = " ".join(text.lower().split())
+    if text in REPEAT_KINDS:
+        return preset_rule(text, local_dt)
+
+    if " " not in text:
+        # Weekday list
+        parse_cron(f"0 0 * * {text}")
+        return f"{local_dt.minute} {local_dt.hour} * * {text}"
+
+    parse_cron(text)
+    return text
+
+
+def describe_rule(expression: str) -> Tuple[str, dict]:
+    """Kind of rule and its format arguments, for localized display"""
+    minute, hour, day, month, weekday = expression.split()
+    simple_time = minute.isdigit() and hour.isdigit() and month == "*"
+    if simple_time and day == "*" and weekday == "*":
+        return "daily", {}
+    if simple_time and day == "*" and weekday == "1-5":
+        return "weekdays", {}
+    if simple_time and day == "*":
+        names = [WEEKDAY_NAMES[d] for d in sorted(parse_cron(expression).weekdays)]
+        return "weekly", {"days": ", ".join(names)}
+    if simple_time and day.isdigit() and weekday == "*":
+        return "monthly", {"day": day}
+    return "cron", {"rule": expression}
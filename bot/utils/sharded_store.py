@@ -0,0 +1,342 @@
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from bot.utils.files import FileLock
+from bot.utils.models import Reminder, Reminders, UserData, UserProfile, encode_data
+from bot.utils.store import (
+    ALL_USERS, DAMAGED_FILE_ERRORS, MemoryStore, read_data_file, read_json_file, write_json_file
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# [earliest due of pending reminders, earliest due of sent reminders], None if there are none
+Bounds = List[Optional[int]]
+
+
+def _lower(old: Optional[int], new: Optional[int]) -> Optional[int]:
+    if old is None or new is None:
+        return new if old is None else old
+    return min(old, new)
+
+
+class ShardedStore(MemoryStore):
+    """In-memory store persisted as one small file per bucket of users.
+
+    Users are spread over ``shard_count`` files by ``user_id % shard_count``
+    (``NNNN.json``), each in the version 2 layout with a
+    ``"shard": [number, count]`` header. A flush only rewrites shards of
+    users that changed, so one user action costs a few kilobytes of I/O
+    however large the data set is.
+
+    ``index.json`` keeps the earliest pending and sent due time of every
+    shard. Shards are loaded on first access to one of their users, and
+    due-window queries only load shards the index says have something in
+    the window. Index values are lower bounds: a lowered value is written
+    before the shard and the exact one after it, so a crash in between
+    only causes a shard to be loaded early.
+
+    The shard count is fixed when the directory is created. The store is
+    single-process and holds an inter-process lock on the directory until
+    ``close()``.
+    """
+
+    SHARED_FILE = False
+
+    def __init__(
+        self,
+        directory: str,
+        shard_count: int = 256,
+        flush_interval: float = 5.0,
+        seed_path: Optional[str] = None
+    ):
+        self.directory = directory
+        self.shard_count = shard_count
+        self.seed_path = seed_path
+        self.index_path = os.path.join(directory, "index.json")
+        self._index: Dict[int, Bounds] = {}
+        self._loaded: Set[int] = set()
+        self._members: Dict[int, Set[int]] = {}  # shard -> user ids
+        self._io_lock = threading.Lock()  # Serializes shard/index writes
+        self._owner_lock = FileLock(directory)
+        if not self._owner_lock.acquire(blocking=False):
+            raise RuntimeError(f"Shard directory {directory} is used by another process")
+        try:
+            super().__init__(self.index_path, flush_interval=flush_interval)
+        except Exception:
+            self._owner_lock.release()
+            raise
+
+    def close(self) -> None:
+        """Write pending changes and let other processes open the directory"""
+        try:
+            super().close()
+        finally:
+            if self._owner_lock is not None:
+                self._owner_lock.release()
+                self._owner_lock = None
+
+    # ---- loading ----
+
+    def _shard_of(self, user_id: int) -> int:
+        return user_id % self.shard_count
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"{shard:04d}.json")
+
+    def _shard_files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.endswith(".json") and name[:-5].isdigit()
+        )
+
+    def _load(self) -> None:
+        """Read shard index, shards themselves are loaded on first access"""
+        self._set_state(({}, {}, {}))
+        if os.path.exists(self.index_path):
+            try:
+                payload = read_json_file(self.index_path)
+                self.shard_count = payload["shards"]
+                self._index = {int(shard): bounds for shard, bounds in payload["due"].items()}
+                logger.info(f"Sharded store opened ({self.shard_count} shards, {len(self._index)} in use)")
+                return
+            except DAMAGED_FILE_ERRORS as e:
+                logger.error(f"Shard index {self.index_path} is damaged ({e}), rebuilding it")
+
+        if self._shard_files():
+            self._rebuild_index()
+        elif self.seed_path and os.path.exists(self.seed_path):
+            # First start in sharded mode: split existing data file
+            self._set_state(read_data_file(self.seed_path)[0])
+            self._loaded = set(range(self.shard_count))
+            self._dirty.add(ALL_USERS)
+            logger.info(f"Sharded store seeded from {self.seed_path}")
+
+    def _rebuild_index(self) -> None:
+        """Load every shard and recompute index (index file lost or damaged)"""
+        first = read_json_file(os.path.join(self.directory, self._shard_files()[0]))
+        self.shard_count = first["shard"][1]
+        for shard in range(self.shard_count):
+            self._load_shard(shard)
+        self._index = {
+            shard: self._bounds(self._reminders, users)
+            for shard, users in self._members.items()
+        }
+        # Rewrite index on next flush
+        self._dirty.add(ALL_USERS)
+        logger.info(f"Shard index rebuilt from {len(self._members)} shards")
+
+    def _set_state(self, state: UserData) -> None:
+        super()._set_state(state)
+        self._members = {}
+        for user_id in self._profiles:
+            self._members.setdefault(self._shard_of(user_id), set()).add(user_id)
+
+    def _load_shard(self, shard: int) -> None:
+        """Read shard into memory unless already there (call with lock held)"""
+        if shard in self._loaded:
+            return
+        self._loaded.add(shard)
+        path = self._shard_path(shard)
+        if not os.path.exists(path):
+            return
+
+        profiles, reminders, next_ids = read_data_file(
+            path, header={"shard": [shard, self.shard_count]}
+        )[0]
+        self._profiles.update(profiles)
+        self._reminders.update(reminders)
+        self._next_ids.update(next_ids)
+        self._members.setdefault(shard, set()).update(profiles)
+        self._due_index.extend(
+            (reminder.due, user_id, reminder.id)
+            for user_id, user_reminders in reminders.items()
+            for reminder in user_reminders.values()
+            if not reminder.sent
+        )
+        self._due_index.sort()
+        logger.debug(f"Shard {shard} loaded ({len(profiles)} users)")
+
+    def _require(self, user_ids: Iterable[int]) -> None:
+        """Load shards of given users (call with lock held)"""
+        for shard in {self._shard_of(user_id) for user_id in user_ids}:
+            self._load_shard(shard)
+
+    def _require_due(self, end: Optional[int], column: int) -> None:
+        """Load shards with pending (column 0) or sent (column 1) reminders due before ``end``"""
+        for shard, bounds in list(self._index.items()):
+            if shard not in self._loaded and bounds[column] is not None \
+                    and (end is None or bounds[column] < end):
+                self._load_shard(shard)
+
+    def _ensure_user(self, user_id: int) -> UserProfile:
+        self._members.setdefault(self._shard_of(user_id), set()).add(user_id)
+        return super()._ensure_user(user_id)
+
+    # ---- persistence ----
+
+    @staticmethod
+    def _bounds(reminders: Reminders, users: Iterable[int]) -> Bounds:
+        bounds: Bounds = [None, None]
+        for user_id in users:
+            for reminder in reminders.get(user_id, {}).values():
+                column = 1 if reminder.sent else 0
+                bounds[column] = _lower(bounds[column], reminder.due)
+        return bounds
+
+    def _write_index(self, index: Dict[int, Bounds]) -> None:
+        write_json_file(self.index_path, {
+            "version": INDEX_VERSION,
+            "shards": self.shard_count,
+            "due": {
+                str(shard): bounds for shard, bounds in sorted(index.items())
+                if bounds != [None, None]
+            }
+        })
+
+    def flush(self) -> bool:
+        """Write shards of changed users, then the shard index"""
+        with self._io_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                dirty = self._dirty
+                self._dirty = set()
+                self._changed.clear()  # Only needed for shared single-file writes
+                if ALL_USERS in dirty:
+                    shards = set(self._members) | set(self._index) | \
+                        {int(name[:-5]) for name in self._shard_files()}
+                else:
+                    shards = {self._shard_of(user_id) for user_id in dirty}
+
+                # Copy containers of dirty shards, encode outside the lock
+                states: Dict[int, UserData] = {}
+                for shard in shards:
+                    users = self._members.get(shard, set())
+                    states[shard] = (
+                        {user_id: self._profiles[user_id] for user_id in users},
+                        {user_id: dict(self._reminders.get(user_id, {})) for user_id in users},
+                        {user_id: self._next_ids[user_id] for user_id in users if user_id in self._next_ids}
+                    )
+
+            try:
+                bounds = {shard: self._bounds(state[1], state[0]) for shard, state in states.items()}
+                lowered = {
+                    shard: [_lower(old, new) for old, new in zip(self._index.get(shard, [None, None]), new_bounds)]
+                    for shard, new_bounds in bounds.items()
+                }
+                if any(lowered[shard] != self._index.get(shard, [None, None]) for shard in lowered):
+                    # Earlier due times must be in the index before they are in a shard
+                    self._write_index({**self._index, **lowered})
+
+                for shard, state in states.items():
+                    payload = encode_data(*state)
+                    payload["shard"] = [shard, self.shard_count]
+                    write_json_file(self._shard_path(shard), payload)
+
+                self._index.update(bounds)
+                self._write_index(self._index)
+            except Exception:
+                # Keep changes pending for the next attempt
+                with self._lock:
+                    self._dirty.update(dirty)
+                raise
+
+        logger.debug(f"Storage flushed ({len(states)} shards)")
+        return True
+
+    # ---- bulk access ----
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            for shard in range(self.shard_count):
+                self._load_shard(shard)
+            return super().snapshot()
+
+    def replace_all(self, data: Dict) -> None:
+        with self._lock:
+            super().replace_all(data)
+            self._loaded = set(range(self.shard_count))
+
+    # ---- per-user access ----
+
+    def get_user(self, user_id: int) -> Dict:
+        with self._lock:
+            self._require((user_id,))
+            return super().get_user(user_id)
+
+    def set_user_field(self, user_id: int, field: str, value: str) -> None:
+        with self._lock:
+            self._require((user_id,))
+            super().set_user_field(user_id, field, value)
+
+    def get_profile(self, user_id: int) -> UserProfile:
+        with self._lock:
+            self._require((user_id,))
+            return super().get_profile(user_id)
+
+    def add_reminder(
+        self,
+        user_id: int,
+        text: str,
+        due: int,
+        repeat: Optional[str] = None,
+        tz: Optional[str] = None
+    ) -> Reminder:
+        with self._lock:
+            self._require((user_id,))
+            return super().add_reminder(user_id, text, due, repeat, tz)
+
+    def get_reminders(self, user_id: int, active_only: bool = True) -> List[Reminder]:
+        with self._lock:
+            self._require((user_id,))
+            return super().get_reminders(user_id, active_only)
+
+    def get_reminder(self, user_id: int, reminder_id: int) -> Optional[Reminder]:
+        with self._lock:
+            self._require((user_id,))
+            return super().get_reminder(user_id, reminder_id)
+
+    def delete_reminder(self, user_id: int, reminder_id: int) -> bool:
+        with self._lock:
+            self._require((user_id,))
+            return super().delete_reminder(user_id, reminder_id)
+
+    def delete_reminders(self, items: List[Tuple[int, int]]) -> int:
+        with self._lock:
+            self._require(user_id for user_id, _ in items)
+            return super().delete_reminders(items)
+
+    def mark_reminders_sent(self, items: List[Tuple[int, int]]) -> List[Tuple[int, Reminder]]:
+        with self._lock:
+            self._require(user_id for user_id, _ in items)
+            return super().mark_reminders_sent(items)
+
+    def reschedule_reminders(
+        self, user_id: int, changes: List[Tuple[int, int, Optional[str]]]
+    ) -> List[Reminder]:
+        with self._lock:
+            self._require((user_id,))
+            return super().reschedule_reminders(user_id, changes)
+
+    # ---- due-time queries ----
+
+    def get_all_pending(self, due_before: Optional[int] = None) -> List[Tuple[int, Reminder]]:
+        with self._lock:
+            self._require_due(None if due_before is None else due_before + 1, 0)
+            return super().get_all_pending(due_before)
+
+    def iter_due_between(self, start: int, end: int) -> Iterator[Tuple[int, Reminder]]:
+        with self._lock:
+            self._require_due(end, 0)
+            return super().iter_due_between(start, end)
+
+    def get_sent(self, due_before: int) -> List[Tuple[int, Reminder]]:
+        with self._lock:
+            self._require_due(due_before, 1)
+            return super().get_sent(due_before)
@@ -0,0 +1,349 @@
+import logging
+import os
+import sqlite3
+import threading
+import time as _time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bot.utils.models import (
+    DEFAULT_PROFILE, Reminder, Reminders, UserProfile, decode_data, export_data
+)
+from bot.utils.store import BaseStore, next_due
+
+logger = logging.getLogger(__name__)
+
+
+# Bumped with every layout change, stored in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id           INTEGER PRIMARY KEY,
+    language          TEXT NOT NULL DEFAULT 'en',
+    timezone          TEXT NOT NULL DEFAULT 'UTC',
+    next_reminder_id  INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS reminders (
+    user_id     INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    id          INTEGER NOT NULL,
+    text        TEXT NOT NULL,
+    due_at_utc  INTEGER NOT NULL,
+    created_at  INTEGER NOT NULL DEFAULT 0,
+    is_sent     INTEGER NOT NULL DEFAULT 0,
+    repeat      TEXT,
+    tz          TEXT,
+    PRIMARY KEY (user_id, id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_reminders_pending
+    ON reminders (is_sent, due_at_utc);
+"""
+
+REMINDER_COLUMNS = "user_id, id, text, due_at_utc, created_at, is_sent, repeat, tz"
+
+
+def _reminder_from_row(row: sqlite3.Row) -> Reminder:
+    return Reminder(
+        id=row["id"],
+        text=row["text"],
+        due=row["due_at_utc"],
+        created=row["created_at"],
+        sent=bool(row["is_sent"]),
+        repeat=row["repeat"],
+        tz=row["tz"]
+    )
+
+
+class SQLiteStore(BaseStore):
+    """SQLite backend (WAL mode) with normalized users/reminders tables.
+
+    Every mutation is committed immediately, WAL keeps those commits cheap
+    and lets readers run concurrently with the writer.
+    """
+
+    PAGE_SIZE = 500  # Rows per query when streaming due windows
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def is_empty(self) -> bool:
+        """Check whether database has no users yet"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone()
+            return row is None
+
+    def _ensure_user(self, user_id: int) -> None:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO users (user_id) VALUES (?)",
+            (user_id,)
+        )
+
+    # ---- bulk access ----
+
+    def snapshot(self) -> Dict:
+        """Export all data in version 1 JSON layout"""
+        with self._lock:
+            profiles = {
+                row["user_id"]: UserProfile(row["language"], row["timezone"])
+                for row in self._conn.execute("SELECT user_id, language, timezone FROM users")
+            }
+            reminders: Reminders = {}
+            rows = self._conn.execute(
+                f"SELECT {REMINDER_COLUMNS} FROM reminders ORDER BY user_id, id"
+            )
+            for row in rows:
+                reminders.setdefault(row["user_id"], {})[row["id"]] = _reminder_from_row(row)
+        return export_data(profiles, reminders)
+
+    def replace_all(self, data: Dict) -> None:
+        """Replace all data with records in any JSON file layout"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reminders")
+            self._conn.execute("DELETE FROM users")
+            self._insert_data(data)
+
+    def _insert_data(self, data: Dict) -> None:
+        profiles, reminders, next_ids = decode_data(data)
+        self._conn.executemany(
+            "INSERT INTO users (user_id, language, timezone, next_reminder_id) VALUES (?, ?, ?, ?)",
+            [
+                (user_id, p.language, p.timezone, next_ids.get(user_id, 1))
+                for user_id, p in profiles.items()
+            ]
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO reminders "
+            "(user_id, id, text, due_at_utc, created_at, is_sent, repeat, tz) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (user_id, r.id, r.text, r.due, r.created, int(r.sent), r.repeat, r.tz)
+                for user_id, user_reminders in reminders.items()
+                for r in user_reminders.values()
+            ]
+        )
+
+    # ---- users ----
+
+    def get_user(self, user_id: int) -> Dict:
+        """Get user record in version 1 layout (default one for unknown user)"""
+        with self._lock:
+            profile = self.get_profile(user_id)
+            reminders = self.get_reminders(user_id, active_only=False)
+        return {**profile.to_dict(), "reminders": [r.to_dict() for r in reminders]}
+
+    def set_user_field(self, user_id: int, field: str, value: str) -> None:
+        """Set single profile field (language/timezone)"""
+        if field not in ("language", "timezone"):
+            raise ValueError(f"Unknown user field: {field}")
+        with self._lock, self._conn:
+            self._ensure_user(user_id)
+            self._conn.execute(
+                f"UPDATE users SET {field} = ? WHERE user_id = ?",
+                (value, user_id)
+            )
+
+    def get_profile(self, user_id: int) -> UserProfile:
+        """Get user language and timezone"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT language, timezone FROM users WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            if row is None:
+                return DEFAULT_PROFILE
+            return UserProfile(row["language"], row["timezone"])
+
+    # ---- reminders ----
+
+    def add_reminder(
+        self,
+        user_id: int,
+        text: str,
+        due: int,
+        repeat: Optional[str] = None,
+        tz: Optional[str] = None
+    ) -> Reminder:
+        """Add new reminder for user (``repeat`` is a cron rule in ``tz``)"""
+        with self._lock, self._conn:
+            self._ensure_user(user_id)
+            # Per-user sequence, ids of deleted reminders are not reused
+            row = self._conn.execute(
+                "SELECT next_reminder_id FROM users WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            self._conn.execute(
+                "UPDATE users SET next_reminder_id = ? WHERE user_id = ?",
+                (row[0] + 1, user_id)
+            )
+            reminder = Reminder(
+                id=row[0],
+                text=text,
+                due=due,
+                created=int(_time.time()),
+                repeat=repeat,
+                tz=tz
+            )
+            self._conn.execute(
+                "INSERT INTO reminders "
+                "(user_id, id, text, due_at_utc, created_at, is_sent, repeat, tz) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                (user_id, reminder.id, text, due, reminder.created, reminder.repeat, reminder.tz)
+            )
+            return reminder
+
+    def get_reminders(self, user_id: int, active_only: bool = True) -> List[Reminder]:
+        """Get user reminders"""
+        query = f"SELECT {REMINDER_COLUMNS} FROM reminders WHERE user_id = ?"
+        if active_only:
+            query += " AND is_sent = 0"
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", (user_id,))
+            return [_reminder_from_row(row) for row in rows]
+
+    def get_reminder(self, user_id: int, reminder_id: int) -> Optional[Reminder]:
+        """Single reminder by ID (sent ones included), None if missing"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {REMINDER_COLUMNS} FROM reminders WHERE user_id = ? AND id = ?",
+                (user_id, reminder_id)
+            ).fetchone()
+            return None if row is None else _reminder_from_row(row)
+
+    def delete_reminder(self, user_id: int, reminder_id: int) -> bool:
+        """Delete reminder by ID"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM reminders WHERE user_id = ? AND id = ?",
+                (user_id, reminder_id)
+            )
+            return cursor.rowcount > 0
+
+    def delete_reminders(self, items: List[Tuple[int, int]]) -> int:
+        """Delete many (user_id, reminder_id) pairs in one transaction"""
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "DELETE FROM reminders WHERE user_id = ? AND id = ?",
+                items
+            )
+            return self._conn.total_changes - before
+
+    def mark_reminder_sent(self, user_id: int, reminder_id: int) -> bool:
+        """Mark reminder as sent (recurring one moves to next occurrence)"""
+        return bool(self.mark_reminders_sent([(user_id, reminder_id)]))
+
+    def mark_reminders_sent(self, items: List[Tuple[int, int]]) -> List[Tuple[int, Reminder]]:
+        """Acknowledge many fired reminders in one transaction"""
+        now = _time.time()
+        updated = []
+        with self._lock, self._conn:
+            for user_id, reminder_id in items:
+                row = self._conn.execute(
+                    f"SELECT {REMINDER_COLUMNS} FROM reminders "
+                    "WHERE user_id = ? AND id = ? AND is_sent = 0",
+                    (user_id, reminder_id)
+                ).fetchone()
+                if row is None:
+                    continue
+
+                reminder = _reminder_from_row(row)
+                due = next_due(reminder, now)
+                if due is not None:
+                    self._conn.execute(
+                        "UPDATE reminders SET due_at_utc = ? WHERE user_id = ? AND id = ?",
+                        (due, user_id, reminder_id)
+                    )
+                    reminder = reminder.replace(due=due)
+                else:
+                    self._conn.execute(
+                        "UPDATE reminders SET is_sent = 1 WHERE user_id = ? AND id = ?",
+                        (user_id, reminder_id)
+                    )
+                    reminder = reminder.replace(sent=True)
+                updated.append((user_id, reminder))
+        return updated
+
+    def reschedule_reminders(
+        self, user_id: int, changes: List[Tuple[int, int, Optional[str]]]
+    ) -> List[Reminder]:
+        """Move pending reminders to new due time and timezone in one transaction"""
+        updated = []
+        with self._lock, self._conn:
+            for reminder_id, due, tz in changes:
+                cursor = self._conn.execute(
+                    "UPDATE reminders SET due_at_utc = ?, tz = ? "
+                    "WHERE user_id = ? AND id = ? AND is_sent = 0",
+                    (due, tz, user_id, reminder_id)
+                )
+                if cursor.rowcount:
+                    row = self._conn.execute(
+                        f"SELECT {REMINDER_COLUMNS} FROM reminders WHERE user_id = ? AND id = ?",
+                        (user_id, reminder_id)
+                    ).fetchone()
+                    updated.append(_reminder_from_row(row))
+        return updated
+
+    def get_all_pending(self, due_before: Optional[int] = None) -> List[Tuple[int, Reminder]]:
+        """Get pending reminders ordered by due time (uses pending index)"""
+        query = f"SELECT {REMINDER_COLUMNS} FROM reminders WHERE is_sent = 0"
+        params: tuple = ()
+        if due_before is not None:
+            query += " AND due_at_utc <= ?"
+            params = (due_before,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY due_at_utc", params)
+            return [(row["user_id"], _reminder_from_row(row)) for row in rows]
+
+    def get_sent(self, due_before: int) -> List[Tuple[int, Reminder]]:
+        """Sent reminders due before ``due_before`` (uses pending index)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {REMINDER_COLUMNS} FROM reminders "
+                "WHERE is_sent = 1 AND due_at_utc < ? ORDER BY due_at_utc",
+                (due_before,)
+            )
+            return [(row["user_id"], _reminder_from_row(row)) for row in rows]
+
+    def iter_due_between(self, start: int, end: int) -> Iterator[Tuple[int, Reminder]]:
+        """Pending reminders with ``start <= due < end``, ordered by due time.
+
+        Streams from the pending index in pages, the lock is not held
+        between pages.
+        """
+        after = (start, -1, -1)  # Last (due, user_id, id) returned
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {REMINDER_COLUMNS} FROM reminders "
+                    "WHERE is_sent = 0 AND due_at_utc >= ? AND due_at_utc < ? "
+                    "AND (due_at_utc, user_id, id) > (?, ?, ?) "
+                    "ORDER BY due_at_utc, user_id, id LIMIT ?",
+                    (after[0], end, *after, self.PAGE_SIZE)
+                ).fetchall()
+            for row in rows:
+                yield row["user_id"], _reminder_from_row(row)
+            if len(rows) < self.PAGE_SIZE:
+                return
+            last = rows[-1]
+            after = (last["due_at_utc"], last["user_id"], last["id"])
@@ -1,183 +1,360 @@
-import json
+import atexit
+import logging
 import os
-from typing import Dict, List, Optional
-from datetime import datetime
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+from bot.config import (
+    DATA_DIR, STORAGE_BACKEND, STORAGE_FORMAT, STORAGE_FLUSH_INTERVAL, JOURNAL_COMPACT_BYTES,
+    STORAGE_SHARDS, PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL, REMINDER_LIST_CACHE_SIZE, DIALOG_TTL_SECONDS
+)
+from bot.utils.archive import ReminderArchive
+from bot.utils.dialogs import DialogStore
+from bot.utils.models import Reminder, UserProfile, encode_data
+from bot.utils.cache import LRUCache
+from bot.utils.recurrence import next_occurrence
+from bot.utils.store import BaseStore, MemoryStore, read_data_file
+from bot.utils.timezones import move_wall_time
 
-DATA_FILE = "data/reminders.json"
+logger = logging.getLogger(__name__)
+
+
+DATA_FILE = os.path.join(DATA_DIR, "reminders.json")
+SQLITE_FILE = os.path.join(DATA_DIR, "reminders.db")
+SNAPSHOT_FILE = os.path.join(DATA_DIR, "snapshot.json")
+JOURNAL_FILE = os.path.join(DATA_DIR, "journal.log")
+SHARD_DIR = os.path.join(DATA_DIR, "shards")
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+DIALOG_FILE = os.path.join(DATA_DIR, "dialogs.json")
+
+_store: Optional[BaseStore] = None
+_dialogs: Optional[DialogStore] = None
+_store_lock = threading.Lock()
+
+# Language/timezone of recently active users, invalidated on every profile write
+profile_cache: LRUCache[int, UserProfile] = LRUCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+# Sorted active reminders of recently listed users,
+# invalidated on every reminder change of the user
+reminder_lists: LRUCache[int, Tuple[Reminder, ...]] = LRUCache(REMINDER_LIST_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+# Sent reminders moved out of the live store
+archive = ReminderArchive(ARCHIVE_DIR)
+
+# Callbacks notified about reminder changes:
+# listener(event, user_id, reminder_id, reminder or None for "delete")
+ReminderListener = Callable[[str, int, int, Optional[Reminder]], None]
+_listeners: List[ReminderListener] = []
+
+
+def create_store(backend: str = STORAGE_BACKEND) -> BaseStore:
+    """Create storage engine for configured backend"""
+    if backend == "json":
+        return MemoryStore(
+            DATA_FILE,
+            flush_interval=STORAGE_FLUSH_INTERVAL,
+            binary=STORAGE_FORMAT == "binary"
+        )
+
+    if backend == "sqlite":
+        from bot.utils.sqlite_store import SQLiteStore
+
+        store = SQLiteStore(SQLITE_FILE)
+        if store.is_empty() and os.path.exists(DATA_FILE):
+            # First start on SQLite: import existing JSON data once
+            store.replace_all(encode_data(*read_data_file(DATA_FILE)[0]))
+            logger.info(f"Imported {DATA_FILE} into {SQLITE_FILE}")
+        return store
+
+    if backend == "journal":
+        from bot.utils.journal_store import JournalStore
+
+        return JournalStore(
+            SNAPSHOT_FILE,
+            JOURNAL_FILE,
+            flush_interval=STORAGE_FLUSH_INTERVAL,
+            compact_bytes=JOURNAL_COMPACT_BYTES,
+            seed_path=DATA_FILE,
+            binary=STORAGE_FORMAT == "binary"
+        )
+
+    if backend == "sharded":
+        from bot.utils.sharded_store import ShardedStore
+
+        return ShardedStore(
+            SHARD_DIR,
+            shard_count=STORAGE_SHARDS,
+            flush_interval=STORAGE_FLUSH_INTERVAL,
+            seed_path=DATA_FILE
+        )
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def get_store() -> BaseStore:
+    """Get process-wide storage engine (created on first use)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = create_store()
+                store.start()
+                atexit.register(store.close)
+                _store = store
+    return _store
+
+
+def get_dialog_store() -> DialogStore:
+    """Get unfinished FSM dialogs of this process (created on first use)"""
+    global _dialogs
+    if _dialogs is None:
+        with _store_lock:
+            if _dialogs is None:
+                dialogs = DialogStore(DIALOG_FILE, DIALOG_TTL_SECONDS, flush_interval=STORAGE_FLUSH_INTERVAL)
+                dialogs.start()
+                atexit.register(dialogs.close)
+                _dialogs = dialogs
+    return _dialogs
+
+
+def flush_storage() -> None:
+    """Write pending changes to disk right now"""
+    if _store is not None:
+        _store.flush()
+
+
+def close_storage() -> None:
+    """Flush pending changes and stop storage engine (call on shutdown)"""
+    global _store, _dialogs
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            atexit.unregister(_store.close)
+            _store = None
+        if _dialogs is not None:
+            _dialogs.close()
+            atexit.unregister(_dialogs.close)
+            _dialogs = None
+
+
+def add_listener(listener: ReminderListener) -> None:
+    """Subscribe to reminder changes ("add", "delete", "sent", "next", "move").
+
+    Listeners are called on the thread that made the change.
+    """
+    _listeners.append(listener)
+
+
+def remove_listener(listener: ReminderListener) -> None:
+    """Unsubscribe from reminder changes"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _notify(event: str, user_id: int, reminder_id: int, reminder: Optional[Reminder] = None) -> None:
+    reminder_lists.invalidate(user_id)
+    for listener in list(_listeners):
+        try:
+            listener(event, user_id, reminder_id, reminder)
+        except Exception as e:
+            logger.error(f"Error in storage listener: {e}", exc_info=True)
 
 
 def load_data() -> Dict:
-    """Load all data from JSON file"""
-    if not os.path.exists(DATA_FILE):
-        # Create data directory if not exists
-        os.makedirs("data", exist_ok=True)
-        return {}
-    
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+    """Load all data (copy in version 1 JSON layout)"""
+    return get_store().snapshot()
 
 
 def save_data(data: Dict) -> None:
-    """Save all data to JSON file"""
-    os.makedirs("data", exist_ok=True)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Replace all data, written on next flush"""
+    get_store().replace_all(data)
+    profile_cache.clear()
+    reminder_lists.clear()
 
 
 def get_user_data(user_id: int) -> Dict:
     """Get user data from storage"""
-    data = load_data()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in data:
-        # Initialize new user with default values
-        data[user_id_str] = {
-            "language": "en",
-            "timezone": "UTC",  # Will be used in stage 8
-            "reminders": []
-        }
-        save_data(data)
-    
-    return data[user_id_str]
+    return get_store().get_user(user_id)
+
+
+def get_user_profile(user_id: int) -> UserProfile:
+    """Get user language and timezone (served from profile cache)"""
+    profile = profile_cache.get(user_id)
+    if profile is None:
+        generation = profile_cache.generation()
+        profile = get_store().get_profile(user_id)
+        profile_cache.put(user_id, profile, generation)
+    return profile
 
 
 def set_user_language(user_id: int, language: str) -> None:
     """Set user language preference"""
-    data = load_data()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in data:
-        data[user_id_str] = {
-            "language": language,
-            "timezone": "UTC",
-            "reminders": []
-        }
-    else:
-        data[user_id_str]["language"] = language
-    
-    save_data(data)
+    get_store().set_user_field(user_id, "language", language)
+    profile_cache.invalidate(user_id)
 
 
 def get_user_language(user_id: int) -> str:
     """Get user language from storage"""
-    user_data = get_user_data(user_id)
-    return user_data.get("language", "en")
-
-
-def add_reminder(user_id: int, text: str, date: str, time: str) -> Dict:
-    """Add new reminder for user"""
-    data = load_data()
-    user_id_str = str(user_id)
-    
-    # Ensure user data exists
-    if user_id_str not in data:
-        data[user_id_str] = {
-            "language": "en",
-            "timezone": "UTC",
-            "reminders": []
-        }
-    
-    # Create reminder object
-    reminder = {
-        "id": len(data[user_id_str]["reminders"]) + 1,  # Simple ID generation
-        "text": text,
-        "date": date,
-        "time": time,
-        "datetime": f"{date} {time}",  # Combined for easier sorting
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "is_sent": False
-    }
-    
-    # Add reminder to user's list
-    data[user_id_str]["reminders"].append(reminder)
-    save_data(data)
-    
+    return get_user_profile(user_id).language
+
+
+def add_reminder(
+    user_id: int,
+    text: str,
+    due: int,
+    repeat: Optional[str] = None,
+    tz: Optional[str] = None
+) -> Reminder:
+    """Add new reminder for user.
+
+    ``repeat`` is a cron rule (see bot.utils.recurrence) evaluated in
+    timezone ``tz``, ``due`` is the first occurrence in UTC epoch seconds.
+    """
+    reminder = get_store().add_reminder(user_id, text, due, repeat, tz)
+    _notify("add", user_id, reminder.id, reminder)
     return reminder
 
 
-def get_user_reminders(user_id: int, active_only: bool = True) -> List[Dict]:
+def get_user_reminders(user_id: int, active_only: bool = True) -> List[Reminder]:
     """Get all reminders for user"""
-    user_data = get_user_data(user_id)
-    reminders = user_data.get("reminders", [])
-    
-    if active_only:
-        # Return only reminders that haven't been sent
-        return [r for r in reminders if not r.get("is_sent", False)]
-    
+    return get_store().get_reminders(user_id, active_only=active_only)
+
+
+def get_sorted_reminders(user_id: int) -> Tuple[Reminder, ...]:
+    """Active reminders of user ordered by due time (cached for list pages)"""
+    reminders = reminder_lists.get(user_id)
+    if reminders is None:
+        generation = reminder_lists.generation()
+        reminders = tuple(sorted(get_store().get_reminders(user_id), key=lambda r: (r.due, r.id)))
+        reminder_lists.put(user_id, reminders, generation)
     return reminders
 
 
+def get_reminder(user_id: int, reminder_id: int) -> Optional[Reminder]:
+    """Get single reminder by ID, None if missing"""
+    return get_store().get_reminder(user_id, reminder_id)
+
+
 def delete_reminder(user_id: int, reminder_id: int) -> bool:
     """Delete reminder by ID"""
-    data = load_data()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in data:
-        return False
-    
-    reminders = data[user_id_str]["reminders"]
-    initial_length = len(reminders)
-    
-    # Filter out the reminder with matching ID
-    data[user_id_str]["reminders"] = [
-        r for r in reminders if r.get("id") != reminder_id
-    ]
-    
-    save_data(data)
-    return len(data[user_id_str]["reminders"]) < initial_length
+    deleted = get_store().delete_reminder(user_id, reminder_id)
+    if deleted:
+        _notify("delete", user_id, reminder_id)
+    return deleted
+
+
+def _notify_acked(updated: List[Tuple[int, Reminder]]) -> None:
+    for user_id, reminder in updated:
+        # Recurring reminders come back with their next occurrence
+        _notify("sent" if reminder.sent else "next", user_id, reminder.id, reminder)
 
 
 def mark_reminder_sent(user_id: int, reminder_id: int) -> bool:
-    """Mark reminder as sent"""
-    data = load_data()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in data:
-        return False
-    
-    for reminder in data[user_id_str]["reminders"]:
-        if reminder.get("id") == reminder_id:
-            reminder["is_sent"] = True
-            save_data(data)
-            return True
-    
-    return False
-
-
-def get_all_pending_reminders() -> List[tuple]:
-    """Get all pending reminders from all users (for background task)"""
-    data = load_data()
-    pending = []
-    
-    for user_id_str, user_data in data.items():
-        for reminder in user_data.get("reminders", []):
-            if not reminder.get("is_sent", False):
-                pending.append((int(user_id_str), reminder))
-    
-    return pending
+    """Mark reminder as sent (recurring one moves to next occurrence)"""
+    updated = get_store().mark_reminders_sent([(user_id, reminder_id)])
+    _notify_acked(updated)
+    return bool(updated)
+
+
+def mark_reminders_sent(items: List[Tuple[int, int]]) -> int:
+    """Acknowledge many fired (user_id, reminder_id) pairs in one write.
+
+    One-shot reminders are marked as sent, recurring ones move to their
+    next occurrence. Changes are flushed to disk before returning.
+    Returns number of reminders that were acknowledged.
+    """
+    store = get_store()
+    updated = store.mark_reminders_sent(items)
+    store.flush()
+    _notify_acked(updated)
+    return len(updated)
+
+
+def get_all_pending_reminders(due_before: Optional[int] = None) -> List[Tuple[int, Reminder]]:
+    """Get all pending reminders from all users (for background task).
+
+    With ``due_before`` (UTC epoch seconds) only reminders due up to that
+    moment are returned.
+    """
+    return get_store().get_all_pending(due_before)
+
+
+def iter_due_between(start: int, end: int) -> Iterator[Tuple[int, Reminder]]:
+    """Stream pending reminders with ``start <= due < end`` (UTC epoch seconds).
+
+    Ordered by due time and read from the store's due index, so only the
+    window is touched.
+    """
+    return get_store().iter_due_between(start, end)
+
 
 def get_user_timezone(user_id: int) -> str:
     """Get user timezone from storage"""
-    user_data = get_user_data(user_id)
-    return user_data.get("timezone", "UTC")
+    return get_user_profile(user_id).timezone
 
 
 def set_user_timezone(user_id: int, timezone: str) -> None:
-    """Set user timezone preference"""
-    data = load_data()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in data:
-        data[user_id_str] = {
-            "language": "en",
-            "timezone": timezone,
-            "reminders": []
-        }
-    else:
-        data[user_id_str]["timezone"] = timezone
-    
-    save_data(data)
\ No newline at end of file
+    """Set user timezone preference.
+
+    Pending reminders keep their local clock time: they move to the same
+    date and time in the new zone and recurring rules follow the new
+    zone. A reminder whose moved time has already passed keeps its moment
+    (recurring ones jump to their next occurrence).
+    """
+    store = get_store()
+    old_timezone = store.get_profile(user_id).timezone
+    store.set_user_field(user_id, "timezone", timezone)
+    profile_cache.invalidate(user_id)
+    if old_timezone == timezone:
+        return
+
+    pending = store.get_reminders(user_id)
+    now = int(time.time())
+    changes = []
+    for reminder, due in zip(pending, move_wall_time([r.due for r in pending], old_timezone, timezone)):
+        if reminder.repeat:
+            if due <= now:
+                due = next_occurrence(reminder.repeat, timezone, now)
+            if due is not None:
+                changes.append((reminder.id, due, timezone))
+        elif due > now and due != reminder.due:
+            changes.append((reminder.id, due, reminder.tz))
+
+    if changes:
+        for reminder in store.reschedule_reminders(user_id, changes):
+            _notify("move", user_id, reminder.id, reminder)
+        logger.info(f"Moved {len(changes)} reminders of user {user_id} from {old_timezone} to {timezone}")
+
+
+def archive_sent_reminders(older_than: float) -> int:
+    """Move reminders sent more than ``older_than`` seconds ago to archive.
+
+    The archive is written before reminders leave the live store, so a
+    crash in between can only archive them twice, never lose them.
+    Returns number of archived reminders.
+    """
+    store = get_store()
+    items = store.get_sent(int(time.time() - older_than))
+    if not items:
+        return 0
+
+    archive.append(items)
+    store.delete_reminders([(user_id, reminder.id) for user_id, reminder in items])
+    store.flush()
+    return len(items)
+
+
+def get_archived_reminders(
+    user_id: int,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Reminder]:
+    """Archived reminders of user due in [since, until], most recent first"""
+    return archive.user_history(user_id, since, until, limit)
+
+
+def expire_dialogs() -> int:
+    """Drop FSM dialogs idle for longer than DIALOG_TTL_SECONDS, return how many"""
+    return get_dialog_store().expire()
@@ -0,0 +1,639 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time as _time
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from bot.utils.binary_codec import is_binary_file, read_binary_file, write_binary_file
+from bot.utils.files import FileLock, atomic_write, backup_path, file_signature
+from bot.utils.models import (
+    DEFAULT_PROFILE, NextIds, Reminder, UserData, UserProfile, Profiles, Reminders,
+    decode_data, due_timestamp, encode_data, export_data
+)
+from bot.utils.recurrence import next_occurrence
+
+logger = logging.getLogger(__name__)
+
+# Marks a change that is not bound to one user (replace_all)
+ALL_USERS = -1
+
+# What a damaged data file raises while being decoded
+DAMAGED_FILE_ERRORS = (ValueError, KeyError, TypeError, IndexError, AttributeError)
+
+
+def next_due(reminder: Reminder, now: Optional[float] = None) -> Optional[int]:
+    """Next occurrence of recurring reminder after it fired, None for one-shot.
+
+    Occurrences missed while the bot was down are skipped, the next one is
+    always in the future.
+    """
+    if not reminder.repeat:
+        return None
+    now = _time.time() if now is None else now
+    return next_occurrence(reminder.repeat, reminder.tz, max(reminder.due, int(now)))
+
+
+def read_json_file(path: str) -> Dict:
+    """Read whole JSON file, empty dict if missing (ValueError if broken)"""
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json_file(path: str, data: Dict) -> None:
+    """Write whole data file atomically, previous one kept as backup"""
+    atomic_write(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def read_data_file(path: str, header: Optional[Dict] = None) -> Tuple[UserData, int, bool]:
+    """Read data file or snapshot in any format and layout.
+
+    Returns user data, journal sequence (0 if the file has none) and
+    whether the file uses the version 1 JSON layout. ``header`` lists
+    fields a JSON file must carry with exactly these values.
+
+    A damaged file is moved aside to ``<path>.corrupt`` and the last good
+    version (``<path>.bak``) is restored in its place. Storage only starts
+    empty if there is no usable backup either.
+    """
+    if not os.path.exists(path):
+        return decode_data({}), 0, False
+
+    try:
+        return _read_data(path, header)
+    except DAMAGED_FILE_ERRORS as e:
+        corrupt_path = path + ".corrupt"
+        os.replace(path, corrupt_path)
+        logger.error(f"Data file {path} is corrupted ({e}), moved to {corrupt_path}")
+
+    backup = backup_path(path)
+    if os.path.exists(backup):
+        try:
+            result = _read_data(backup, header)
+        except DAMAGED_FILE_ERRORS as e:
+            logger.error(f"Backup {backup} is corrupted too ({e})")
+        else:
+            with open(backup, "rb") as f:
+                atomic_write(path, f.read(), backup=False)
+            logger.warning(f"Data file {path} restored from last good backup {backup}")
+            return result
+
+    logger.error(f"No usable backup of {path}, starting with empty storage")
+    return decode_data({}), 0, False
+
+
+def _read_data(path: str, header: Optional[Dict] = None) -> Tuple[UserData, int, bool]:
+    """Decode data file, raises on damaged contents"""
+    if is_binary_file(path):
+        state, seq = read_binary_file(path)
+        return state, seq, False
+
+    payload = read_json_file(path)
+    for field, value in (header or {}).items():
+        if payload.get(field) != value:
+            raise ValueError(f"Header field {field!r} is {payload.get(field)!r}, expected {value!r}")
+    seq = payload.get("seq", 0)
+    legacy = bool(payload) and "version" not in payload
+    if payload.get("version") == 1:
+        # Version 1 journal snapshot kept version 1 user records under "users"
+        payload = payload["users"]
+    return decode_data(payload), seq, legacy
+
+
+class BaseStore:
+    """Interface every storage backend implements.
+
+    Records are exchanged as ``Reminder`` and ``UserProfile`` models, so
+    backends are interchangeable behind ``bot.utils.storage``. Returned
+    models may be shared with the store and must not be modified.
+    """
+
+    def start(self) -> None:
+        """Start background work (if backend needs any)"""
+
+    def close(self) -> None:
+        """Release resources, writing pending changes"""
+
+    def flush(self) -> bool:
+        """Write pending changes, True if anything was written"""
+        return False
+
+    def snapshot(self) -> Dict:
+        """Export all data in version 1 JSON layout"""
+        raise NotImplementedError
+
+    def replace_all(self, data: Dict) -> None:
+        """Replace all data with records in any JSON file layout"""
+        raise NotImplementedError
+
+    def get_user(self, user_id: int) -> Dict:
+        raise NotImplementedError
+
+    def set_user_field(self, user_id: int, field: str, value: str) -> None:
+        raise NotImplementedError
+
+    def get_profile(self, user_id: int) -> UserProfile:
+        raise NotImplementedError
+
+    def add_reminder(
+        self,
+        user_id: int,
+        text: str,
+        due: int,
+        repeat: Optional[str] = None,
+        tz: Optional[str] = None
+    ) -> Reminder:
+        raise NotImplementedError
+
+    def get_reminders(self, user_id: int, active_only: bool = True) -> List[Reminder]:
+        raise NotImplementedError
+
+    def get_reminder(self, user_id: int, reminder_id: int) -> Optional[Reminder]:
+        """Single reminder by ID (sent ones included), None if missing"""
+        raise NotImplementedError
+
+    def delete_reminder(self, user_id: int, reminder_id: int) -> bool:
+        raise NotImplementedError
+
+    def mark_reminder_sent(self, user_id: int, reminder_id: int) -> bool:
+        raise NotImplementedError
+
+    def mark_reminders_sent(self, items: List[Tuple[int, int]]) -> List[Tuple[int, Reminder]]:
+        """Acknowledge fired reminders.
+
+        One-shot reminders are marked as sent, recurring ones are moved to
+        their next occurrence. Returns (user_id, updated reminder) pairs.
+        """
+        raise NotImplementedError
+
+    def reschedule_reminders(
+        self, user_id: int, changes: List[Tuple[int, int, Optional[str]]]
+    ) -> List[Reminder]:
+        """Move pending reminders to new (reminder_id, due, tz) values.
+
+        Reminders that were deleted or sent meanwhile are skipped. Returns
+        the updated reminders.
+        """
+        raise NotImplementedError
+
+    def get_all_pending(self, due_before: Optional[int] = None) -> List[Tuple[int, Reminder]]:
+        raise NotImplementedError
+
+    def iter_due_between(self, start: int, end: int) -> Iterator[Tuple[int, Reminder]]:
+        """Pending reminders with ``start <= due < end``, ordered by due time.
+
+        Served from an ordered due index, so the cost depends on the
+        reminders in the window, not on everything stored.
+        """
+        raise NotImplementedError
+
+    def get_sent(self, due_before: int) -> List[Tuple[int, Reminder]]:
+        """Sent reminders due before ``due_before`` (candidates for archive)"""
+        raise NotImplementedError
+
+    def delete_reminders(self, items: List[Tuple[int, int]]) -> int:
+        """Delete many (user_id, reminder_id) pairs at once, return count"""
+        raise NotImplementedError
+
+
+class MemoryStore(BaseStore):
+    """Process-wide in-memory store with periodic write-back to data file.
+
+    All reads are served from memory. Mutations only mark the user as dirty,
+    a background thread flushes dirty state every ``flush_interval`` seconds
+    and once more on ``close()``. Models are immutable, so readers get them
+    without copying and a flush only copies the containers.
+
+    Reminders are indexed by user and reminder id, so lookups, deletes and
+    acknowledgements cost O(1) regardless of how many reminders a user has.
+    Reminder ids come from a per-user sequence that is persisted with the
+    data, so ids of deleted reminders are never handed out again. Pending
+    reminders are also kept in a sorted (due, user_id, reminder_id) index
+    for due-window queries.
+
+    With ``binary`` the file is written in the binary snapshot format (see
+    bot.utils.binary_codec) instead of JSON. Either format is read.
+
+    Several processes may share one data file. Writes replace the file
+    atomically under an inter-process lock; if another process replaced
+    it since our last flush, its version is read back and only the
+    reminders and profiles changed here are laid over it. Changes made
+    elsewhere become visible on the next flush. Adding a reminder reads
+    the file back and writes it under the same lock, so a reminder id is
+    in the file before any other process can hand it out again.
+    """
+
+    # Data file may be shared with other processes (subclasses that own
+    # their files exclusively turn this off)
+    SHARED_FILE = True
+
+    def __init__(self, path: str, flush_interval: float = 5.0, binary: bool = False):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.binary = binary
+        self._lock = threading.RLock()
+        self._profiles: Profiles = {}
+        self._reminders: Reminders = {}
+        self._next_ids: NextIds = {}
+        self._due_index: List[Tuple[int, int, int]] = []
+        self._dirty: Set[int] = set()
+        # Reminder ids (None for the profile) changed per user since last flush
+        self._changed: Dict[int, Set[Optional[int]]] = {}
+        self._file_lock = FileLock(path)
+        self._synced: Optional[Tuple[int, int, int]] = None  # File written/read last
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        """Load persisted data into memory"""
+        with self._file_lock:
+            state, _, legacy = read_data_file(self.path)
+            self._synced = file_signature(self.path)
+        self._set_state(state)
+        if legacy:
+            # Keep the old file and rewrite data in current layout
+            shutil.copyfile(self.path, self.path + ".v1")
+            self._dirty.add(ALL_USERS)
+            logger.info(f"Data file {self.path} will be upgraded (backup in {self.path}.v1)")
+
+    def _set_state(self, state: UserData) -> None:
+        """Replace all data and rebuild due index (call with lock held)"""
+        self._profiles, self._reminders, self._next_ids = state
+        self._due_index = sorted(
+            (reminder.due, user_id, reminder.id)
+            for user_id, reminders in self._reminders.items()
+            for reminder in reminders.values()
+            if not reminder.sent
+        )
+
+    def _reindex(self, user_id: int, old: Optional[Reminder], new: Optional[Reminder]) -> None:
+        """Keep due index in step with a reminder change"""
+        if old is not None and not old.sent:
+            key = (old.due, user_id, old.id)
+            index = bisect_left(self._due_index, key)
+            if index < len(self._due_index) and self._due_index[index] == key:
+                del self._due_index[index]
+        if new is not None and not new.sent:
+            insort(self._due_index, (new.due, user_id, new.id))
+
+    # ---- lifecycle ----
+
+    def start(self) -> None:
+        """Start background flush thread"""
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name="storage-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+
+    def close(self) -> None:
+        """Stop background flushing and write pending changes"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing storage: {e}", exc_info=True)
+
+    def _copy_state(self) -> UserData:
+        """Consistent copy of containers (call with lock held)"""
+        return dict(self._profiles), {
+            user_id: dict(reminders) for user_id, reminders in self._reminders.items()
+        }, dict(self._next_ids)
+
+    def flush(self) -> bool:
+        """Write data file if anything changed since last flush.
+
+        Also picks up a file written by another process meanwhile: it is
+        merged with local changes and becomes the in-memory state.
+        """
+        with self._file_lock:
+            merged = self._read_back()
+            dirty = self._write_dirty()
+
+        if merged:
+            logger.debug("Storage merged with data file written by another process")
+        if dirty:
+            logger.debug(f"Storage flushed ({dirty} dirty users)")
+        return bool(dirty)
+
+    def _read_back(self) -> bool:
+        """Merge data file written by another process (file lock held)"""
+        if file_signature(self.path) == self._synced:
+            return False
+        disk = read_data_file(self.path)[0]
+        with self._lock:
+            if ALL_USERS not in self._dirty:
+                self._set_state(self._merge(disk, self._changed))
+        self._synced = file_signature(self.path)
+        return True
+
+    def _write_dirty(self) -> int:
+        """Write data file if anything changed (file lock held), return dirty user count"""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty, changed = self._dirty, self._changed
+            self._dirty, self._changed = set(), {}
+            # Single file: copy state under the lock, encode and
+            # write it outside so readers are not blocked by disk I/O
+            state = self._copy_state()
+
+        try:
+            if self.binary:
+                write_binary_file(self.path, state)
+            else:
+                write_json_file(self.path, encode_data(*state))
+        except Exception:
+            # Keep changes pending for the next attempt
+            with self._lock:
+                self._dirty.update(dirty)
+                for user_id, keys in changed.items():
+                    self._changed.setdefault(user_id, set()).update(keys)
+            raise
+        self._synced = file_signature(self.path)
+        return len(dirty)
+
+    def _merge(self, disk: UserData, changed: Dict[int, Set[Optional[int]]]) -> UserData:
+        """Lay local changes over data file written by another process"""
+        profiles, reminders, next_ids = disk
+        for user_id, keys in changed.items():
+            if None in keys or user_id not in profiles:
+                profiles[user_id] = self._profiles.get(user_id, DEFAULT_PROFILE)
+            own = self._reminders.get(user_id, {})
+            user_reminders = reminders.setdefault(user_id, {})
+            for reminder_id in keys:
+                if reminder_id is None:
+                    continue
+                reminder = own.get(reminder_id)
+                if reminder is None:
+                    user_reminders.pop(reminder_id, None)
+                else:
+                    user_reminders[reminder_id] = reminder
+            next_ids[user_id] = max(next_ids.get(user_id, 1), self._next_ids.get(user_id, 1))
+        return profiles, reminders, next_ids
+
+    def _touch(self, user_id: int) -> None:
+        self._dirty.add(user_id)
+
+    def _ensure_user(self, user_id: int) -> UserProfile:
+        profile = self._profiles.get(user_id)
+        if profile is None:
+            profile = self._profiles[user_id] = DEFAULT_PROFILE
+            self._reminders.setdefault(user_id, {})
+            self._touch(user_id)
+        return profile
+
+    # ---- bulk access ----
+
+    def snapshot(self) -> Dict:
+        """Export all data in version 1 JSON layout"""
+        with self._lock:
+            profiles, reminders, _ = self._copy_state()
+        return export_data(profiles, reminders)
+
+    def replace_all(self, data: Dict) -> None:
+        """Replace all data (used by legacy save_data)"""
+        state = decode_data(data)
+        with self._lock:
+            self._set_state(state)
+            self._dirty.update(self._profiles)
+            # Make sure removals are written too
+            self._dirty.add(ALL_USERS)
+
+    # ---- mutations ----
+
+    def _apply(self, op: Dict, record: bool = True) -> bool:
+        """Apply single mutation to in-memory data.
+
+        Every change goes through here as a small op dict, so other
+        backends can persist or replay the same ops. Ops written by older
+        versions (string user ids, dict reminders, date/time strings) are
+        accepted as well.
+        """
+        user_id = int(op["u"])
+        kind = op["o"]
+
+        if kind == "set":
+            profile = self._ensure_user(user_id)
+            self._profiles[user_id] = profile.replace(**{op["f"]: op["v"]})
+        elif kind == "add":
+            self._ensure_user(user_id)
+            reminder = Reminder.from_record(op["r"])
+            old = self._reminders.setdefault(user_id, {}).get(reminder.id)
+            self._reminders[user_id][reminder.id] = reminder
+            self._reindex(user_id, old, reminder)
+            self._next_ids[user_id] = max(self._next_ids.get(user_id, 1), reminder.id + 1)
+        elif kind == "del":
+            old = self._reminders.get(user_id, {}).pop(op["id"], None)
+            if old is None:
+                return False
+            self._reindex(user_id, old, None)
+        elif kind in ("sent", "next", "move"):
+            old = self._reminders.get(user_id, {}).get(op["id"])
+            if old is None or (kind == "move" and old.sent):
+                return False
+            if kind == "sent":
+                reminder = old.replace(sent=True)
+            elif kind == "move":
+                reminder = old.replace(due=op["due"], tz=op["tz"])
+            else:
+                due = op["due"] if "due" in op else due_timestamp(op["date"], op["time"])
+                reminder = old.replace(due=due)
+            self._reminders[user_id][reminder.id] = reminder
+            self._reindex(user_id, old, reminder)
+        else:
+            raise ValueError(f"Unknown storage op: {kind}")
+
+        if record:
+            self._record(op)
+        return True
+
+    def _record(self, op: Dict) -> None:
+        """Remember applied op for persistence"""
+        user_id = int(op["u"])
+        self._touch(user_id)
+        if op["o"] == "set":
+            key = None
+        elif op["o"] == "add":
+            key = op["r"][0]
+        else:
+            key = op["id"]
+        self._changed.setdefault(user_id, set()).add(key)
+
+    # ---- users ----
+
+    def get_user(self, user_id: int) -> Dict:
+        """Get user record in version 1 layout (default one for unknown user)"""
+        with self._lock:
+            profile = self._profiles.get(user_id, DEFAULT_PROFILE)
+            reminders = list(self._reminders.get(user_id, {}).values())
+        return {**profile.to_dict(), "reminders": [r.to_dict() for r in reminders]}
+
+    def set_user_field(self, user_id: int, field: str, value: str) -> None:
+        """Set single profile field (language/timezone)"""
+        if field not in UserProfile.__slots__:
+            raise ValueError(f"Unknown user field: {field}")
+        with self._lock:
+            self._apply({"o": "set", "u": user_id, "f": field, "v": value})
+
+    def get_profile(self, user_id: int) -> UserProfile:
+        """Get user language and timezone"""
+        with self._lock:
+            return self._profiles.get(user_id, DEFAULT_PROFILE)
+
+    # ---- reminders ----
+
+    def add_reminder(
+        self,
+        user_id: int,
+        text: str,
+        due: int,
+        repeat: Optional[str] = None,
+        tz: Optional[str] = None
+    ) -> Reminder:
+        """Add new reminder for user (``repeat`` is a cron rule in ``tz``)"""
+        if not self.SHARED_FILE:
+            return self._new_reminder(user_id, text, due, repeat, tz)
+
+        with self._file_lock:
+            # Pick up ids handed out by other processes, then write ours
+            # before releasing the lock so none of them reuses it
+            self._read_back()
+            reminder = self._new_reminder(user_id, text, due, repeat, tz)
+            try:
+                self._write_dirty()
+            except Exception:
+                # Id is not reserved in the file, take the reminder back
+                with self._lock:
+                    self._apply({"o": "del", "u": user_id, "id": reminder.id}, record=False)
+                    self._changed.get(user_id, set()).discard(reminder.id)
+                raise
+        return reminder
+
+    def _new_reminder(
+        self,
+        user_id: int,
+        text: str,
+        due: int,
+        repeat: Optional[str],
+        tz: Optional[str]
+    ) -> Reminder:
+        with self._lock:
+            self._ensure_user(user_id)
+
+            reminder = Reminder(
+                id=self._next_ids.get(user_id, 1),
+                text=text,
+                due=due,
+                created=int(_time.time()),
+                repeat=repeat,
+                tz=tz
+            )
+            self._apply({"o": "add", "u": user_id, "r": reminder.to_record()})
+            return reminder
+
+    def get_reminders(self, user_id: int, active_only: bool = True) -> List[Reminder]:
+        """Get user reminders"""
+        with self._lock:
+            return [
+                r for r in self._reminders.get(user_id, {}).values()
+                if not (active_only and r.sent)
+            ]
+
+    def get_reminder(self, user_id: int, reminder_id: int) -> Optional[Reminder]:
+        """Single reminder by ID (sent ones included), None if missing"""
+        with self._lock:
+            return self._reminders.get(user_id, {}).get(reminder_id)
+
+    def delete_reminder(self, user_id: int, reminder_id: int) -> bool:
+        """Delete reminder by ID"""
+        with self._lock:
+            return self._apply({"o": "del", "u": user_id, "id": reminder_id})
+
+    def delete_reminders(self, items: List[Tuple[int, int]]) -> int:
+        """Delete many (user_id, reminder_id) pairs at once, return count"""
+        with self._lock:
+            return sum(
+                self._apply({"o": "del", "u": user_id, "id": reminder_id})
+                for user_id, reminder_id in items
+            )
+
+    def mark_reminder_sent(self, user_id: int, reminder_id: int) -> bool:
+        """Mark reminder as sent (recurring one moves to next occurrence)"""
+        return bool(self.mark_reminders_sent([(user_id, reminder_id)]))
+
+    def mark_reminders_sent(self, items: List[Tuple[int, int]]) -> List[Tuple[int, Reminder]]:
+        """Acknowledge many fired reminders at once"""
+        now = _time.time()
+        updated = []
+        with self._lock:
+            for user_id, reminder_id in items:
+                reminder = self._reminders.get(user_id, {}).get(reminder_id)
+                if reminder is None or reminder.sent:
+                    continue
+
+                due = next_due(reminder, now)
+                if due is not None:
+                    op = {"o": "next", "u": user_id, "id": reminder_id, "due": due}
+                else:
+                    op = {"o": "sent", "u": user_id, "id": reminder_id}
+                self._apply(op)
+                updated.append((user_id, self._reminders[user_id][reminder_id]))
+        return updated
+
+    def reschedule_reminders(
+        self, user_id: int, changes: List[Tuple[int, int, Optional[str]]]
+    ) -> List[Reminder]:
+        """Move pending reminders to new due time and timezone"""
+        with self._lock:
+            return [
+                self._reminders[user_id][reminder_id]
+                for reminder_id, due, tz in changes
+                if self._apply({"o": "move", "u": user_id, "id": reminder_id, "due": due, "tz": tz})
+            ]
+
+    def get_all_pending(self, due_before: Optional[int] = None) -> List[Tuple[int, Reminder]]:
+        """Get pending reminders ordered by due time, optionally only due ones"""
+        with self._lock:
+            end = len(self._due_index)
+            if due_before is not None:
+                end = bisect_left(self._due_index, (due_before + 1,))
+            return self._resolve(self._due_index[:end])
+
+    def iter_due_between(self, start: int, end: int) -> Iterator[Tuple[int, Reminder]]:
+        """Pending reminders with ``start <= due < end``, ordered by due time"""
+        with self._lock:
+            keys = self._due_index[
+                bisect_left(self._due_index, (start,)):bisect_left(self._due_index, (end,))
+            ]
+            return iter(self._resolve(keys))
+
+    def _resolve(self, keys: List[Tuple[int, int, int]]) -> List[Tuple[int, Reminder]]:
+        return [(user_id, self._reminders[user_id][reminder_id]) for _, user_id, reminder_id in keys]
+
+    def get_sent(self, due_before: int) -> List[Tuple[int, Reminder]]:
+        """Sent reminders due before ``due_before`` (candidates for archive)"""
+        with self._lock:
+            return [
+                (user_id, reminder)
+                for user_id, reminders in self._reminders.items()
+                for reminder in reminders.values()
+                if reminder.sent and reminder.due < due_before
+            ]
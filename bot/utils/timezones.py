@@ -1,5 +1,21 @@
-from typing import List, Tuple
-from datetime import datetime
+import calendar
+import logging
+from bisect import bisect_right
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+UTC = timezone.utc
+
+# Range covered by precomputed transition tables (2000-01-01 .. 2100-01-01 UTC),
+# conversions outside of it ask zoneinfo directly
+TABLE_START = 946684800
+TABLE_END = 4102444800
+# Offsets are probed once per day, changes are then located to the second
+PROBE_STEP = 86400
 
 
 # Popular timezones with user-friendly names
@@ -30,38 +46,154 @@ def get_timezone_keyboard_data() -> List[Tuple[str, str]]:
     return TIMEZONES
 
 
-def convert_to_utc(date_str: str, time_str: str, user_timezone: str) -> datetime:
-    """Convert user's local datetime to UTC"""
+@lru_cache(maxsize=None)
+def get_zone(name: Optional[str]) -> tzinfo:
+    """Cached tz object for IANA name, UTC for empty or unknown names"""
+    if not name or name == "UTC":
+        return UTC
     try:
-        # Parse user's datetime
-        local_dt_str = f"{date_str} {time_str}"
-        naive_dt = datetime.strptime(local_dt_str, "%Y-%m-%d %H:%M")
-        
-        # Localize to user's timezone
-        user_tz = pytz.timezone(user_timezone)
-        local_dt = user_tz.localize(naive_dt)
-        
-        # Convert to UTC
-        utc_dt = local_dt.astimezone(pytz.UTC)
-        
-        return utc_dt
-    except Exception:
-        # Fallback to naive datetime if conversion fails
-        return datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone {name!r}, using UTC")
+        return UTC
+
+
+class ZoneTable:
+    """UTC offset transitions of one zone, for conversions without tzinfo calls.
+
+    ``transitions`` are UTC epoch seconds where the offset changes and
+    ``offsets[i]`` is the offset in force before ``transitions[i]`` (the
+    last one after all of them). Local times ("wall" epoch seconds, i.e.
+    the local clock read as if it were UTC) resolve like zoneinfo with
+    ``fold=0``: a time skipped by a DST gap is shifted forward, a repeated
+    one maps to its first occurrence.
+
+    Fixed-offset zones (UTC) need no table. Other zones are probed once a
+    day over the covered range, ~0.1 s per zone, so tables of TIMEZONES
+    are built at startup (``prebuild_zone_tables``) and other zones off
+    the event loop (see ``zone_table_ready``).
+    """
+
+    __slots__ = ("zone", "transitions", "offsets", "_wall")
+
+    def __init__(self, zone: tzinfo):
+        self.zone = zone
+        self.transitions: List[int] = []
+        self.offsets: List[int] = [self._probe(TABLE_START)]
+        self._wall: List[int] = []
+        if isinstance(zone, timezone):
+            return  # Same offset at every moment
+
+        ts = TABLE_START
+        while ts < TABLE_END:
+            nxt = min(ts + PROBE_STEP, TABLE_END)
+            offset = self._probe(nxt)
+            if offset != self.offsets[-1]:
+                # Binary search for the first second with the new offset
+                low, high = ts, nxt
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if self._probe(middle) == offset:
+                        high = middle
+                    else:
+                        low = middle
+                self.transitions.append(high)
+                self.offsets.append(offset)
+            ts = nxt
+
+        # Wall time from which the offset after each transition applies
+        self._wall = [
+            ts + max(before, after)
+            for ts, before, after in zip(self.transitions, self.offsets, self.offsets[1:])
+        ]
+
+    def _probe(self, ts: int) -> int:
+        return int(datetime.fromtimestamp(ts, self.zone).utcoffset().total_seconds())
+
+    def utc_offset(self, ts: int) -> int:
+        """Offset in seconds at UTC epoch ``ts``"""
+        if not TABLE_START <= ts < TABLE_END:
+            return self._probe(ts)
+        return self.offsets[bisect_right(self.transitions, ts)]
+
+    def to_local(self, ts: int) -> int:
+        """UTC epoch seconds to local wall seconds"""
+        return ts + self.utc_offset(ts)
+
+    def to_utc(self, wall: int) -> int:
+        """Local wall seconds to UTC epoch seconds"""
+        if not TABLE_START <= wall < TABLE_END:
+            local = datetime.utcfromtimestamp(wall).replace(tzinfo=self.zone)
+            return int(local.timestamp())
+        return wall - self.offsets[bisect_right(self._wall, wall)]
+
+
+_tables: Dict[Optional[str], ZoneTable] = {}
+
+
+def get_zone_table(name: Optional[str]) -> ZoneTable:
+    """Cached transition table of zone (built on first use)"""
+    table = _tables.get(name)
+    if table is None:
+        table = _tables[name] = ZoneTable(get_zone(name))
+    return table
+
+
+def zone_table_ready(name: Optional[str]) -> bool:
+    """Check whether ``get_zone_table(name)`` is a lookup, not a build"""
+    return name in _tables
+
+
+def prebuild_zone_tables(names: Optional[Iterable[str]] = None) -> int:
+    """Build tables of given zones (selectable TIMEZONES by default), return count"""
+    names = [tz_id for tz_id, _ in TIMEZONES] if names is None else list(names)
+    for name in names:
+        get_zone_table(name)
+    return len(names)
+
+
+def wall_seconds(date_str: str, time_str: str) -> int:
+    """Local "YYYY-MM-DD" and "HH:MM" as wall seconds (ValueError if malformed)"""
+    local = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+    return calendar.timegm(local.timetuple())
+
+
+def local_to_timestamp(date_str: str, time_str: str, user_timezone: str) -> int:
+    """User's local date and time to UTC epoch seconds"""
+    return get_zone_table(user_timezone).to_utc(wall_seconds(date_str, time_str))
+
+
+def convert_to_utc(date_str: str, time_str: str, user_timezone: str) -> datetime:
+    """Convert user's local datetime to aware UTC datetime.
+
+    Raises ValueError for malformed date/time, unknown zones count as UTC.
+    """
+    return datetime.fromtimestamp(local_to_timestamp(date_str, time_str, user_timezone), UTC)
 
 
 def get_user_local_time(utc_datetime: datetime, user_timezone: str) -> datetime:
-    """Convert UTC datetime to user's local time"""
-    try:
-        user_tz = pytz.timezone(user_timezone)
-        
-        # Ensure UTC datetime is timezone-aware
-        if utc_datetime.tzinfo is None:
-            utc_datetime = pytz.UTC.localize(utc_datetime)
-        
-        # Convert to user's timezone
-        local_dt = utc_datetime.astimezone(user_tz)
-        
-        return local_dt
-    except Exception:
-        return utc_datetime
+    """Convert UTC datetime (naive ones are taken as UTC) to user's local time"""
+    if utc_datetime.tzinfo is None:
+        utc_datetime = utc_datetime.replace(tzinfo=UTC)
+    return utc_datetime.astimezone(get_zone(user_timezone))
+
+
+def local_now(user_timezone: str) -> datetime:
+    """Current time in user's timezone"""
+    return datetime.now(get_zone(user_timezone))
+
+
+def local_date_time(ts: int, user_timezone: str) -> Tuple[str, str]:
+    """UTC epoch seconds as user's local date and time strings"""
+    local = datetime.utcfromtimestamp(get_zone_table(user_timezone).to_local(ts))
+    return local.strftime("%Y-%m-%d"), local.strftime("%H:%M")
+
+
+def move_wall_time(timestamps: Sequence[int], old_timezone: str, new_timezone: str) -> List[int]:
+    """Keep local clock time of many UTC timestamps when the zone changes.
+
+    Each moment is read on the ``old_timezone`` clock and the same clock
+    time is resolved in ``new_timezone``; one table lookup per direction.
+    """
+    old, new = get_zone_table(old_timezone), get_zone_table(new_timezone)
+    return [new.to_utc(old.to_local(ts)) for ts in timestamps]
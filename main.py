@@ -3,9 +3,19 @@ import logging
 import sys
 from aiogram import Bot, Dispatcher
 from aiogram.types import BotCommand, BotCommandScopeDefault, BotCommandScopeChat
-from bot.config import TOKEN
-from bot.handlers import start, reminders
+from bot.config import TOKEN, RUN_SCHEDULER, ARCHIVE_RETENTION_DAYS, DIALOG_TTL_SECONDS
+from bot.handlers import buttons, callbacks, start, reminders
+from bot.middlewares.profile import UserProfileMiddleware
+from bot.services.archiver import archive_loop
+from bot.services.dialog_sweeper import dialog_sweep_loop
+from bot.services.leases import create_lease_manager
 from bot.services.scheduler import reminder_scheduler
+from bot.services.metrics import metrics
+from bot.utils.fsm_storage import DialogStorage
+from bot.utils.storage import get_dialog_store, get_store, close_storage
+from bot.utils import async_storage
+from bot.utils.outbox import close_outbox, get_outbox
+from bot.utils.timezones import prebuild_zone_tables
 
 # Configure logging
 logging.basicConfig(
@@ -70,21 +80,46 @@ async def main():
         
         logger.info("Initializing bot...")
         
-        # Initialize bot and dispatcher
+        # Load storage into memory and start background flushing
+        get_store()
+        get_dialog_store()
+        logger.info("Storage loaded")
+        
+        # Timezone tables are slow to build, keep that out of handlers
+        zones = await async_storage.run_blocking(prebuild_zone_tables)
+        logger.info(f"Timezone tables built for {zones} zones")
+        await async_storage.run_blocking(get_outbox)
+        
+        # Initialize bot and dispatcher (unfinished dialogs survive restarts)
         bot = Bot(token=TOKEN)
-        dp = Dispatcher()
+        dp = Dispatcher(storage=DialogStorage())
         
         # Set bot commands (menu)
         await set_bot_commands(bot)
         
-        # Register routers
+        # Resolve user language/timezone once per update
+        dp.update.outer_middleware(UserProfileMiddleware())
+        
+        # Register routers (reply buttons first, they work in any dialog state)
+        dp.include_router(buttons.router)
+        dp.include_router(callbacks.router)
         dp.include_router(start.router)
         dp.include_router(reminders.router)
         logger.info("Routers registered")
         
-        # Start background scheduler task
-        scheduler_task = asyncio.create_task(reminder_scheduler(bot))
-        logger.info("Background scheduler task created")
+        # Start background scheduler task (unless separate workers send reminders)
+        if RUN_SCHEDULER:
+            leases = create_lease_manager()
+            scheduler_task = asyncio.create_task(reminder_scheduler(bot, leases))
+            logger.info("Background scheduler task created")
+        
+        # Move old sent reminders out of the live store
+        if ARCHIVE_RETENTION_DAYS > 0:
+            archive_task = asyncio.create_task(archive_loop())
+        
+        # Drop reminder dialogs abandoned halfway
+        if DIALOG_TTL_SECONDS > 0:
+            sweep_task = asyncio.create_task(dialog_sweep_loop())
         
         # Start polling
         logger.info("Bot started successfully! Waiting for messages...")
@@ -94,6 +129,20 @@ async def main():
         logger.error(f"Fatal error in main(): {e}", exc_info=True)
         raise
     finally:
+        if 'sweep_task' in locals():
+            sweep_task.cancel()
+            try:
+                await sweep_task
+            except asyncio.CancelledError:
+                pass
+        
+        if 'archive_task' in locals():
+            archive_task.cancel()
+            try:
+                await archive_task
+            except asyncio.CancelledError:
+                pass
+        
         # Cancel scheduler task on shutdown
         if 'scheduler_task' in locals():
             scheduler_task.cancel()
@@ -101,6 +150,15 @@ async def main():
                 await scheduler_task
             except asyncio.CancelledError:
                 logger.info("Scheduler task cancelled")
+            logger.info(f"Scheduler metrics: {metrics.snapshot()}")
+            if leases is not None:
+                leases.close()
+        
+        # Finish queued storage calls and write pending changes before exit
+        async_storage.shutdown()
+        close_storage()
+        close_outbox()
+        logger.info("Storage flushed")
 
 
 
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import sys
+from aiogram import Bot
+from bot.config import TOKEN, WORKER_ID
+from bot.services.leases import create_lease_manager
+from bot.services.scheduler import reminder_scheduler
+from bot.services.metrics import metrics
+from bot.utils.storage import get_store, close_storage
+from bot.utils import async_storage
+from bot.utils.outbox import close_outbox, get_outbox
+from bot.utils.timezones import prebuild_zone_tables
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Scheduler-only process: sends reminders of its leased partitions"""
+    leases = create_lease_manager()
+    if leases is None:
+        logger.error("Set SCHEDULER_PARTITIONS to run separate scheduler workers")
+        sys.exit(2)
+
+    get_store()
+    await async_storage.run_blocking(prebuild_zone_tables)
+    await async_storage.run_blocking(get_outbox)
+    bot = Bot(token=TOKEN)
+    logger.info(f"Scheduler worker {WORKER_ID} started")
+
+    try:
+        await reminder_scheduler(bot, leases)
+    finally:
+        logger.info(f"Scheduler metrics: {metrics.snapshot()}")
+        await bot.session.close()
+        leases.close()
+        async_storage.shutdown()
+        close_storage()
+        close_outbox()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Scheduler worker stopped by user")
+    except Exception as e:
+        logger.error(f"Scheduler worker crashed: {e}", exc_info=True)
+        sys.exit(1)
@@ -8,6 +8,6 @@ setup(
         "aiogram==3.22.0",
         "aiohttp==3.12.15",
         "python-dotenv==1.2.1",
-        "pytz==2024.1",
+        "tzdata==2025.2; sys_platform == 'win32'",
     ],
 )
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from bot.utils.journal_store import JournalStore
+
+
+class TornJournalTailTest(unittest.TestCase):
+    """A crash in the middle of a journal append must not cost later ops"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self._tmp.name, "snapshot.json")
+        self.journal = os.path.join(self._tmp.name, "journal.log")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def open_store(self) -> JournalStore:
+        return JournalStore(self.snapshot, self.journal, compact_bytes=1 << 30)
+
+    def test_ops_after_torn_tail_survive_restart(self):
+        store = self.open_store()
+        store.add_reminder(1, "before crash", 1900000000)
+        store.close()
+
+        # Simulated crash: half of the next line reached the disk
+        with open(self.journal, "ab") as f:
+            f.write(b'{"s":2,"o":"add","u":1,"r":[2,"lost')
+
+        store = self.open_store()
+        self.assertEqual([r.text for r in store.get_reminders(1)], ["before crash"])
+        store.add_reminder(1, "after crash", 1900000060)
+        store.close()
+
+        store = self.open_store()
+        try:
+            self.assertEqual(
+                sorted(r.text for r in store.get_reminders(1)),
+                ["after crash", "before crash"]
+            )
+        finally:
+            store.close()
+
+    def test_unterminated_last_line_is_dropped(self):
+        store = self.open_store()
+        store.add_reminder(1, "kept", 1900000000)
+        store.close()
+
+        with open(self.journal, "rb") as f:
+            complete = f.read()
+        with open(self.journal, "ab") as f:
+            f.write(b'{"s":2,"o":"del","u":1,"id":1}')  # Newline never written
+
+        self.open_store().close()
+        with open(self.journal, "rb") as f:
+            self.assertEqual(f.read(), complete)
+
+
+if __name__ == "__main__":
+    unittest.main()